@@ -1,3 +1,6 @@
+from strips import Action, Planner
+
+# Monkey-and-banana domain for the STRIPS planner in strips.py
 class MonkeyBananaProblem:
     def __init__(self, monkey, banana, box):
         self.monkey = monkey
@@ -7,16 +10,40 @@ class MonkeyBananaProblem:
         self.has_banana = False
         self.step = 0
 
-    def Monkey_go_box(self):
+    def actions(self):
+        places = sorted({self.monkey, self.banana, self.box})
+        actions = []
+        for x in places:
+            for y in places:
+                if x != y:
+                    actions.append(Action("go", [("monkey_at", x), "on_floor"],
+                                          [("monkey_at", y)], [("monkey_at", x)], (x, y)))
+                    actions.append(Action("push", [("monkey_at", x), ("box_at", x), "on_floor"],
+                                          [("monkey_at", y), ("box_at", y)],
+                                          [("monkey_at", x), ("box_at", x)], (x, y)))
+            actions.append(Action("climb", [("monkey_at", x), ("box_at", x), "on_floor"],
+                                  ["on_box"], ["on_floor"], (x,)))
+            actions.append(Action("grab", ["on_box", ("box_at", x), ("banana_at", x)],
+                                  ["has_banana"], [], (x,)))
+        return actions
+
+    def initial_state(self):
+        facts = [("monkey_at", self.monkey), ("box_at", self.box), ("banana_at", self.banana)]
+        facts.append("on_box" if self.monkey_on_box else "on_floor")
+        if self.has_banana:
+            facts.append("has_banana")
+        return facts
+
+    def Monkey_go_box(self, source, target):
         self.step += 1
-        print(f"step: {self.step} Monkey goes to {self.box} from {self.monkey}")
-        self.monkey = self.box
+        print(f"step: {self.step} Monkey goes to {target} from {source}")
+        self.monkey = target
 
-    def Monkey_move_box(self):
+    def Monkey_move_box(self, source, target):
         self.step += 1
-        print(f"step: {self.step} Monkey catches the box from {self.box} to {self.banana}")
-        self.box = self.banana
-        self.monkey = self.banana
+        print(f"step: {self.step} Monkey catches the box from {source} to {target}")
+        self.box = target
+        self.monkey = target
 
     def Monkey_on_box(self):
         self.step += 1
@@ -29,15 +56,21 @@ class MonkeyBananaProblem:
         self.has_banana = True
 
     def solve(self):
-        if self.monkey != self.box:
-            self.Monkey_go_box()
-        if self.box != self.banana:
-            self.Monkey_move_box()
-        if not self.monkey_on_box:
-            self.Monkey_on_box()
-        if not self.has_banana:
-            self.Monkey_get_banana()
-
-monkey, banana, box = map(int, input().split())
-problem = MonkeyBananaProblem(monkey, banana, box)
-problem.solve()
\ No newline at end of file
+        plan = Planner(self.actions(), self.initial_state(), ["has_banana"]).solve()
+        if plan is None:
+            print("No plan found")
+            return
+        for action in plan:
+            if action.name == "go":
+                self.Monkey_go_box(*action.args)
+            elif action.name == "push":
+                self.Monkey_move_box(*action.args)
+            elif action.name == "climb":
+                self.Monkey_on_box()
+            elif action.name == "grab":
+                self.Monkey_get_banana()
+
+if __name__ == "__main__":
+    monkey, banana, box = map(int, input().split())
+    problem = MonkeyBananaProblem(monkey, banana, box)
+    problem.solve()
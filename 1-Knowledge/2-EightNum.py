@@ -1,27 +1,431 @@
+import argparse
+import heapq
+import mmap
+import os
+import sys
+import time
 from collections import deque
+from itertools import islice
+from multiprocessing import Pool
+from math import factorial, isqrt
 
-def solve_eight_puzzle(initial_state):
-    goal_state = "12345678x"
-    moves = [1, -1, 3, -3]
-    initial_state = ''.join(initial_state.split())
-    queue = deque([(initial_state, 0)])
-    visited = set([initial_state])
-    while queue:
-        state, steps = queue.popleft()
-        if state == goal_state:
-            return steps
-        x_pos = state.index('x')
-        for move in moves:
-            new_pos = x_pos + move
-            if 0 <= new_pos < 9 and abs(x_pos % 3 - new_pos % 3) <= 1:
-                new_state = list(state)
-                new_state[x_pos], new_state[new_pos] = new_state[new_pos], new_state[x_pos]
-                new_state = ''.join(new_state)
+DISTANCE_TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "eight_puzzle_distances.bin")
+UNREACHABLE = 255
+
+# Parse "2 3 4 1 5 x 7 6 8" (or the compact "23415x768") into a tile list, blank = 0
+def parse_board(initial_state):
+    tokens = initial_state.split()
+    if len(tokens) == 1:
+        tokens = list(tokens[0])
+    size = isqrt(len(tokens))
+    if size < 2 or size * size != len(tokens):
+        raise ValueError(f"Invalid board: {initial_state}")
+    tiles = [0 if token == 'x' else int(token) for token in tokens]
+    if sorted(tiles) != list(range(size * size)):
+        raise ValueError(f"Invalid board: {initial_state}")
+    return tiles, size
+
+# Permutation parity test: half of all boards can never reach the goal
+def is_solvable(tiles, size):
+    seq = [tile for tile in tiles if tile]
+    inversions = sum(1 for i in range(len(seq)) for j in range(i + 1, len(seq)) if seq[i] > seq[j])
+    if size % 2 == 1:
+        return inversions % 2 == 0
+    blank_row_from_bottom = size - tiles.index(0) // size
+    return (inversions + blank_row_from_bottom) % 2 == 1
+
+def longest_increasing_subsequence(seq):
+    best = [1] * len(seq)
+    for i in range(len(seq)):
+        for j in range(i):
+            if seq[j] < seq[i] and best[j] + 1 > best[i]:
+                best[i] = best[j] + 1
+    return max(best, default=0)
+
+class SlidingPuzzle:
+    """
+    Tables for an n x n sliding puzzle whose boards are packed into one integer,
+    `bits` bits per cell. The goal is 1..n*n-1 in order with the blank last.
+    """
+    def __init__(self, size):
+        self.size = size
+        self.cells = size * size
+        self.bits = max(4, (self.cells - 1).bit_length())
+        self.mask = (1 << self.bits) - 1
+        self.row_mask = (1 << (self.bits * size)) - 1
+        self.goal = self.pack(list(range(1, self.cells)) + [0])
+        self.neighbours = []
+        for pos in range(self.cells):
+            row, col = divmod(pos, size)
+            adjacent = []
+            if row > 0:
+                adjacent.append(pos - size)
+            if row < size - 1:
+                adjacent.append(pos + size)
+            if col > 0:
+                adjacent.append(pos - 1)
+            if col < size - 1:
+                adjacent.append(pos + 1)
+            self.neighbours.append(adjacent)
+        self.manhattan = [[0] * self.cells]
+        for tile in range(1, self.cells):
+            goal_row, goal_col = divmod(tile - 1, size)
+            self.manhattan.append([abs(pos // size - goal_row) + abs(pos % size - goal_col)
+                                   for pos in range(self.cells)])
+        self.row_conflicts = [{} for _ in range(size)]
+        self.col_conflicts = [{} for _ in range(size)]
+        self.pattern_databases = []
+        self.pattern_of = [None] * self.cells  # tile -> (its pattern group, its digit's weight)
+
+    def pack(self, tiles):
+        state = 0
+        for pos, tile in enumerate(tiles):
+            state |= tile << (self.bits * pos)
+        return state
+
+    def unpack(self, state):
+        return [(state >> (self.bits * pos)) & self.mask for pos in range(self.cells)]
+
+    def move(self, state, blank, pos):
+        # Slide the tile at `pos` into the blank at `blank`
+        tile = (state >> (self.bits * pos)) & self.mask
+        return state ^ (tile << (self.bits * pos)) ^ (tile << (self.bits * blank)), tile
+
+    # Linear conflict: every tile in its goal line that must leave it to let others pass costs 2 moves
+    def _line_conflict(self, tiles, index, in_row):
+        goal_offsets = []
+        for tile in tiles:
+            if tile == 0:
+                continue
+            goal_row, goal_col = divmod(tile - 1, self.size)
+            if in_row and goal_row == index:
+                goal_offsets.append(goal_col)
+            elif not in_row and goal_col == index:
+                goal_offsets.append(goal_row)
+        return 2 * (len(goal_offsets) - longest_increasing_subsequence(goal_offsets))
+
+    def row_conflict(self, state, row):
+        key = (state >> (self.bits * self.size * row)) & self.row_mask
+        cache = self.row_conflicts[row]
+        if key not in cache:
+            tiles = [(key >> (self.bits * col)) & self.mask for col in range(self.size)]
+            cache[key] = self._line_conflict(tiles, row, True)
+        return cache[key]
+
+    def col_conflict(self, state, col):
+        key = 0
+        for row in range(self.size):
+            key |= ((state >> (self.bits * (row * self.size + col))) & self.mask) << (self.bits * row)
+        cache = self.col_conflicts[col]
+        if key not in cache:
+            tiles = [(key >> (self.bits * row)) & self.mask for row in range(self.size)]
+            cache[key] = self._line_conflict(tiles, col, False)
+        return cache[key]
+
+    # Manhattan distance plus linear conflict, the part of h kept up to date incrementally
+    def base_heuristic(self, state):
+        tiles = self.unpack(state)
+        total = sum(self.manhattan[tile][pos] for pos, tile in enumerate(tiles))
+        for line in range(self.size):
+            total += self.row_conflict(state, line) + self.col_conflict(state, line)
+        return total
+
+    # indices: the pattern databases' table indices, updated for the one tile that moves
+    def child(self, state, blank, pos, base, indices=None):
+        child, tile = self.move(state, blank, pos)
+        if indices is not None and self.pattern_of[tile] is not None:
+            group, weight = self.pattern_of[tile]
+            indices = indices[:group] + (indices[group] + (blank - pos) * weight,) + indices[group + 1:]
+        base += self.manhattan[tile][blank] - self.manhattan[tile][pos]
+        size = self.size
+        if pos // size == blank // size:
+            for col in (pos % size, blank % size):
+                base += self.col_conflict(child, col) - self.col_conflict(state, col)
+        else:
+            for row in (pos // size, blank // size):
+                base += self.row_conflict(child, row) - self.row_conflict(state, row)
+        return child, base, indices
+
+    # Additive pattern database: moves of the pattern's tiles only, the other tiles are indistinguishable.
+    # The table is indexed by the pattern tiles' positions read as digits in base `cells` (see pattern_index)
+    def build_pattern_database(self, pattern):
+        start = (tuple(tile - 1 for tile in pattern), self.cells - 1)
+        dist = {start: 0}
+        table = bytearray([UNREACHABLE]) * self.cells ** len(pattern)
+        queue = deque([(0, start)])
+        while queue:
+            d, node = queue.popleft()
+            if dist[node] < d:
+                continue
+            positions, blank = node
+            index = self.pattern_index(positions)
+            if table[index] == UNREACHABLE:
+                table[index] = d
+            for pos in self.neighbours[blank]:
+                if pos in positions:
+                    i = positions.index(pos)
+                    new_node = (positions[:i] + (blank,) + positions[i + 1:], pos)
+                    if dist.get(new_node, d + 2) > d + 1:
+                        dist[new_node] = d + 1
+                        queue.append((d + 1, new_node))
+                else:
+                    new_node = (positions, pos)
+                    if dist.get(new_node, d + 1) > d:
+                        dist[new_node] = d
+                        queue.appendleft((d, new_node))
+        return table
+
+    def pattern_index(self, positions):
+        index = 0
+        for pos in reversed(positions):
+            index = index * self.cells + pos
+        return index
+
+    def use_pattern_databases(self, pattern_groups):
+        tiles = sorted(tile for group in pattern_groups for tile in group)
+        if len(tiles) != len(set(tiles)) or any(not 0 < tile < self.cells for tile in tiles):
+            raise ValueError("Pattern groups must be disjoint sets of tiles")
+        self.pattern_databases = [(tuple(group), load_pattern_database(self, group)) for group in pattern_groups]
+        self.pattern_of = [None] * self.cells
+        for i, group in enumerate(pattern_groups):
+            for digit, tile in enumerate(group):
+                self.pattern_of[tile] = (i, self.cells ** digit)
+
+    def pattern_indices(self, state):
+        if not self.pattern_databases:
+            return None
+        positions = [0] * self.cells
+        for pos in range(self.cells):
+            positions[(state >> (self.bits * pos)) & self.mask] = pos
+        return tuple(self.pattern_index([positions[tile] for tile in group]) for group, _ in self.pattern_databases)
+
+    def heuristic(self, base, indices):
+        if indices is not None:
+            return max(base, sum(table[index] for (_, table), index in zip(self.pattern_databases, indices)))
+        return base
+
+    def bfs(self, state, blank):
+        queue = deque([(state, blank, 0)])
+        visited = {state}
+        while queue:
+            state, blank, steps = queue.popleft()
+            if state == self.goal:
+                return steps
+            for pos in self.neighbours[blank]:
+                new_state, _ = self.move(state, blank, pos)
                 if new_state not in visited:
-                    queue.append((new_state, steps + 1))
                     visited.add(new_state)
-    return -1
+                    queue.append((new_state, pos, steps + 1))
+        return -1
+
+    def astar(self, state, blank):
+        base, indices = self.base_heuristic(state), self.pattern_indices(state)
+        open_list = [(self.heuristic(base, indices), 0, state, blank, base, indices)]
+        best_g = {state: 0}
+        while open_list:
+            _, g, state, blank, base, indices = heapq.heappop(open_list)
+            if state == self.goal:
+                return g
+            if best_g[state] < g:
+                continue
+            for pos in self.neighbours[blank]:
+                child, child_base, child_indices = self.child(state, blank, pos, base, indices)
+                if best_g.get(child, g + 2) > g + 1:
+                    best_g[child] = g + 1
+                    heapq.heappush(open_list, (g + 1 + self.heuristic(child_base, child_indices),
+                                               g + 1, child, pos, child_base, child_indices))
+        return -1
+
+    def ida_star(self, state, blank):
+        found = -1
+
+        def search(state, blank, prev, g, bound, base, indices):
+            f = g + self.heuristic(base, indices)
+            if f > bound:
+                return f
+            if state == self.goal:
+                return found
+            minimum = float('inf')
+            for pos in self.neighbours[blank]:
+                if pos == prev:
+                    continue
+                child, child_base, child_indices = self.child(state, blank, pos, base, indices)
+                t = search(child, pos, blank, g + 1, bound, child_base, child_indices)
+                if t == found:
+                    return found
+                minimum = min(minimum, t)
+            return minimum
+
+        base, indices = self.base_heuristic(state), self.pattern_indices(state)
+        bound = self.heuristic(base, indices)
+        while True:
+            t = search(state, blank, -1, 0, bound, base, indices)
+            if t == found:
+                return bound
+            if t == float('inf'):
+                return -1
+            bound = t
+
+# Lehmer code: index of the permutation among all n! orderings of its cells
+def permutation_rank(tiles):
+    rank = 0
+    n = len(tiles)
+    for i in range(n):
+        smaller = sum(1 for j in range(i + 1, n) if tiles[j] < tiles[i])
+        rank += smaller * factorial(n - 1 - i)
+    return rank
+
+# One reverse BFS from the goal, storing the distance of every 3x3 board by permutation rank
+def build_distance_table(path=DISTANCE_TABLE_PATH):
+    puzzle = get_puzzle(3)
+    table = bytearray([UNREACHABLE]) * factorial(puzzle.cells)
+    table[permutation_rank(puzzle.unpack(puzzle.goal))] = 0
+    queue = deque([(puzzle.goal, puzzle.cells - 1, 0)])
+    while queue:
+        state, blank, steps = queue.popleft()
+        for pos in puzzle.neighbours[blank]:
+            new_state, _ = puzzle.move(state, blank, pos)
+            rank = permutation_rank(puzzle.unpack(new_state))
+            if table[rank] == UNREACHABLE:
+                table[rank] = steps + 1
+                queue.append((new_state, pos, steps + 1))
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(table)
+    os.replace(tmp_path, path)
+    _distance_table_exists[path] = True
+    return table
+
+_distance_tables = {}
+_distance_table_exists = {}
+
+# Auto mode asks for every board, so the file system is only checked once per path
+def has_distance_table(path=DISTANCE_TABLE_PATH):
+    if path not in _distance_table_exists:
+        _distance_table_exists[path] = os.path.exists(path)
+    return _distance_table_exists[path]
+
+def load_distance_table(path=DISTANCE_TABLE_PATH):
+    if path not in _distance_tables:
+        with open(path, 'rb') as f:
+            table = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(table) != factorial(9):
+            raise ValueError(f"Corrupt distance table: {path}")
+        _distance_tables[path] = table
+    return _distance_tables[path]
+
+def lookup_distance(tiles, path=DISTANCE_TABLE_PATH):
+    steps = load_distance_table(path)[permutation_rank(tiles)]
+    return -1 if steps == UNREACHABLE else steps
+
+def pattern_database_path(size, pattern):
+    return os.path.join(os.path.dirname(DISTANCE_TABLE_PATH),
+                        f"pattern_{size}x{size}_{'-'.join(map(str, pattern))}.bin")
+
+_pattern_databases = {}
+
+# Built once per (size, pattern), then kept on disk next to the distance table and mapped on later runs
+def load_pattern_database(puzzle, pattern):
+    key = (puzzle.size, tuple(pattern))
+    if key not in _pattern_databases:
+        path = pattern_database_path(*key)
+        expected = puzzle.cells ** len(pattern)
+        if os.path.exists(path) and os.path.getsize(path) == expected:
+            with open(path, 'rb') as f:
+                table = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            table = puzzle.build_pattern_database(pattern)
+            tmp_path = path + ".tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(table)
+            os.replace(tmp_path, path)
+        _pattern_databases[key] = table
+    return _pattern_databases[key]
+
+_puzzles = {}
+
+# One puzzle per (size, pattern groups), so databases are loaded once and never swapped on a shared puzzle
+def get_puzzle(size, pattern_groups=None):
+    key = (size, None if pattern_groups is None else tuple(map(tuple, pattern_groups)))
+    if key not in _puzzles:
+        puzzle = SlidingPuzzle(size)
+        if pattern_groups is not None:
+            puzzle.use_pattern_databases(key[1])
+        _puzzles[key] = puzzle
+    return _puzzles[key]
+
+# method: "bfs", "astar", "ida", "table", or "auto"
+# (the distance table for 3x3 when it has been built, otherwise A* for 3x3 and IDA* for larger boards)
+def solve_eight_puzzle(initial_state, method="auto", pattern_groups=None):
+    tiles, size = parse_board(initial_state)
+    if not is_solvable(tiles, size):
+        return -1
+    if method == "auto":
+        if size == 3:
+            method = "table" if has_distance_table() else "astar"
+        else:
+            method = "ida"
+    if method == "table":
+        if size != 3:
+            raise ValueError("The distance table only covers 3x3 boards")
+        return lookup_distance(tiles)
+    puzzle = get_puzzle(size, pattern_groups)
+    state, blank = puzzle.pack(tiles), tiles.index(0)
+    if method == "bfs":
+        return puzzle.bfs(state, blank)
+    elif method == "astar":
+        return puzzle.astar(state, blank)
+    elif method == "ida":
+        return puzzle.ida_star(state, blank)
+    raise ValueError(f"Unknown method: {method}")
+
+# Batch mode: one board per line in, one answer per line out, in input order.
+# Blank lines are answered "Error" like any other unreadable board, so line n of the output
+# always belongs to line n of the input.
+def solve_line(line):
+    if not line.strip():
+        return "Error"
+    try:
+        return str(solve_eight_puzzle(line))
+    except ValueError:
+        return "Error"
+
+def solve_batch(stream, out, workers=None, chunk_size=4096):
+    start = time.perf_counter()
+    solved = 0
+    with Pool(workers) as pool:
+        results = pool.imap(solve_line, stream, chunksize=chunk_size)
+        while True:
+            chunk = list(islice(results, chunk_size))
+            if not chunk:
+                break
+            out.write("\n".join(chunk))
+            out.write("\n")
+            solved += len(chunk)
+    out.flush()
+    elapsed = time.perf_counter() - start
+    return solved, elapsed
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sliding puzzle solver (reads one board from stdin by default)")
+    parser.add_argument("--build-table", nargs="?", const=DISTANCE_TABLE_PATH, metavar="PATH",
+                        help="build the 3x3 distance table and exit")
+    parser.add_argument("--batch", nargs="?", const="-", metavar="FILE",
+                        help="solve one board per line from FILE (default: stdin)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes for --batch")
+    parser.add_argument("--chunk-size", type=int, default=4096, help="boards per worker task and per write")
+    args = parser.parse_args()
 
-initial_state = input()
-steps = solve_eight_puzzle(initial_state)
-print(steps)
\ No newline at end of file
+    if args.build_table:
+        build_distance_table(args.build_table)
+        print(f"Distance table written to {args.build_table}")
+    elif args.batch:
+        stream = sys.stdin if args.batch == "-" else open(args.batch, 'r')
+        with stream:
+            solved, elapsed = solve_batch(stream, sys.stdout, args.workers, args.chunk_size)
+        rate = solved / elapsed if elapsed > 0 else float('inf')
+        print(f"{solved} boards in {elapsed:.2f}s ({rate:.0f} boards/s)", file=sys.stderr)
+    else:
+        initial_state = input()
+        steps = solve_eight_puzzle(initial_state)
+        print(steps)
@@ -1,10 +1,50 @@
-def hanoi(n, source, auxiliary, target):
-    if n == 1:
-        print(f"{source} > {target}")
-        return
-    hanoi(n-1, source, target, auxiliary)
-    print(f"{source} > {target}")
-    hanoi(n-1, auxiliary, source, target)
-
-n = int(input())
-hanoi(n, 'A', 'B', 'C')
\ No newline at end of file
+import sys
+
+# Peg labels in the order used by the binary-counter formulas below;
+# for an even number of disks the tower travels the other way round.
+def peg_order(n, source, auxiliary, target):
+    if n % 2 == 1:
+        return (source, auxiliary, target)
+    return (source, target, auxiliary)
+
+# Move k (1 <= k < 2**n): disk = trailing zeros of k + 1, pegs from the binary counter
+def hanoi_move(n, k, source='A', auxiliary='B', target='C'):
+    if not 1 <= k < 2 ** n:
+        raise ValueError(f"Move {k} is out of range for {n} disks")
+    pegs = peg_order(n, source, auxiliary, target)
+    disk = (k & -k).bit_length()
+    return disk, pegs[(k & (k - 1)) % 3], pegs[((k | (k - 1)) + 1) % 3]
+
+def hanoi_moves(n, source='A', auxiliary='B', target='C'):
+    pegs = peg_order(n, source, auxiliary, target)
+    for k in range(1, 2 ** n):
+        yield pegs[(k & (k - 1)) % 3], pegs[((k | (k - 1)) + 1) % 3]
+
+# Pegs after the first k moves, each listed bottom to top, without replaying the moves
+def hanoi_configuration(n, k, source='A', auxiliary='B', target='C'):
+    if not 0 <= k < 2 ** n:
+        raise ValueError(f"Move {k} is out of range for {n} disks")
+    towers = {source: [], auxiliary: [], target: []}
+    for disk in range(n, 0, -1):
+        half = 1 << (disk - 1)
+        if k < half:
+            towers[source].append(disk)
+            auxiliary, target = target, auxiliary
+        else:
+            towers[target].append(disk)
+            k -= half
+            source, auxiliary = auxiliary, source
+    return towers
+
+def hanoi(n, source, auxiliary, target, out=sys.stdout, chunk_size=65536):
+    buffer = []
+    for move_from, move_to in hanoi_moves(n, source, auxiliary, target):
+        buffer.append(f"{move_from} > {move_to}\n")
+        if len(buffer) >= chunk_size:
+            out.write(''.join(buffer))
+            buffer.clear()
+    out.write(''.join(buffer))
+
+if __name__ == "__main__":
+    n = int(input())
+    hanoi(n, 'A', 'B', 'C')
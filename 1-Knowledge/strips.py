@@ -0,0 +1,157 @@
+import heapq
+from itertools import count
+
+class Action:
+    """A grounded STRIPS action: applicable when all preconditions hold, then delete and add facts."""
+    def __init__(self, name, preconditions, add, delete=(), args=()):
+        self.name = name
+        self.args = tuple(args)
+        self.preconditions = frozenset(preconditions)
+        self.add = frozenset(add)
+        self.delete = frozenset(delete)
+
+    def __repr__(self):
+        return f"{self.name}({', '.join(map(str, self.args))})"
+
+def iter_bits(bits):
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+class Planner:
+    """
+    Compiles facts to bit positions so a state is a frozen bitset (an int), and indexes
+    which actions each fact enables. solve() runs A* guided by the relaxed-plan (FF) heuristic.
+    """
+    def __init__(self, actions, initial, goal):
+        self.actions = list(actions)
+        self.facts = {}
+        for fact in initial:
+            self._fact_index(fact)
+        for fact in goal:
+            self._fact_index(fact)
+        for action in self.actions:
+            for fact in action.preconditions | action.add | action.delete:
+                self._fact_index(fact)
+        self.pre = [self.to_bits(a.preconditions) for a in self.actions]
+        self.add = [self.to_bits(a.add) for a in self.actions]
+        self.delete = [self.to_bits(a.delete) for a in self.actions]
+        self.pre_count = [len(a.preconditions) for a in self.actions]
+        # fact -> actions that need it, and fact -> actions that use it as their trigger
+        self.enables = [[] for _ in self.facts]
+        self.triggers = [[] for _ in self.facts]
+        self.always_applicable = []
+        for i, action in enumerate(self.actions):
+            indices = sorted(self.facts[fact] for fact in action.preconditions)
+            for f in indices:
+                self.enables[f].append(i)
+            if indices:
+                self.triggers[indices[0]].append(i)
+            else:
+                self.always_applicable.append(i)
+        self.initial = self.to_bits(initial)
+        self.goal = self.to_bits(goal)
+        self.goal_facts = list(iter_bits(self.goal))
+        self.expanded = 0
+
+    def _fact_index(self, fact):
+        if fact not in self.facts:
+            self.facts[fact] = len(self.facts)
+        return self.facts[fact]
+
+    def to_bits(self, facts):
+        bits = 0
+        for fact in facts:
+            bits |= 1 << self.facts[fact]
+        return bits
+
+    def applicable(self, state):
+        candidates = list(self.always_applicable)
+        for f in iter_bits(state):
+            candidates.extend(self.triggers[f])
+        return [i for i in candidates if self.pre[i] & state == self.pre[i]]
+
+    def relaxed_plan_length(self, state):
+        # Relaxed planning graph (delete effects ignored), built with precondition counters
+        level = {f: 0 for f in iter_bits(state)}
+        achiever = {}
+        missing = list(self.pre_count)
+        layer = list(level)
+        for i in self.always_applicable:
+            for f in iter_bits(self.add[i]):
+                if f not in level:
+                    level[f] = 1
+                    achiever[f] = i
+        layer += [f for f, l in level.items() if l == 1]
+        depth = 0
+        while not all(f in level for f in self.goal_facts):
+            depth += 1
+            new_layer = []
+            for f in layer:
+                for i in self.enables[f]:
+                    missing[i] -= 1
+                    if missing[i] == 0:
+                        for g in iter_bits(self.add[i]):
+                            if g not in level:
+                                level[g] = depth
+                                achiever[g] = i
+                                new_layer.append(g)
+            if not new_layer:
+                return None
+            layer = new_layer
+        # Extract a relaxed plan backwards from the goals
+        plan = set()
+        agenda = [f for f in self.goal_facts if level[f] > 0]
+        seen = set(agenda)
+        while agenda:
+            f = agenda.pop()
+            i = achiever[f]
+            if i in plan:
+                continue
+            plan.add(i)
+            for g in iter_bits(self.pre[i]):
+                if level[g] > 0 and g not in seen:
+                    seen.add(g)
+                    agenda.append(g)
+        return len(plan)
+
+    def solve(self, weight=1.0):
+        """
+        Returns the list of actions leading from the initial state to the goal, or None.
+        weight > 1 runs weighted A* (f = g + weight * h), trading plan length for speed.
+        """
+        h = self.relaxed_plan_length(self.initial)
+        if h is None:
+            return None
+        tie = count()
+        open_list = [(weight * h, h, next(tie), 0, self.initial)]
+        best_g = {self.initial: 0}
+        parent = {self.initial: None}
+        self.expanded = 0
+        while open_list:
+            _, _, _, g, state = heapq.heappop(open_list)
+            if best_g[state] < g:
+                continue
+            if state & self.goal == self.goal:
+                return self._extract_plan(parent, state)
+            self.expanded += 1
+            for i in self.applicable(state):
+                child = (state & ~self.delete[i]) | self.add[i]
+                if best_g.get(child, g + 2) <= g + 1:
+                    continue
+                h = self.relaxed_plan_length(child)
+                if h is None:
+                    continue
+                best_g[child] = g + 1
+                parent[child] = (state, i)
+                heapq.heappush(open_list, (g + 1 + weight * h, h, next(tie), g + 1, child))
+        return None
+
+    def _extract_plan(self, parent, state):
+        plan = []
+        while parent[state] is not None:
+            state, i = parent[state]
+            plan.append(self.actions[i])
+        plan.reverse()
+        return plan
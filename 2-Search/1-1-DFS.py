@@ -2,14 +2,18 @@ def numIslandsDFS(grid):
     if not grid:
         return 0
     
+    # Explicit stack instead of recursion, so island size is not bounded by the recursion limit
     def dfs(grid, i, j):
-        if i < 0 or i >= len(grid) or j < 0 or j >= len(grid[0]) or grid[i][j] == '0':
-            return
-        grid[i][j] = '0'
-        dfs(grid, i + 1, j)
-        dfs(grid, i - 1, j)
-        dfs(grid, i, j + 1)
-        dfs(grid, i, j - 1)
+        stack = [(i, j)]
+        while stack:
+            i, j = stack.pop()
+            if i < 0 or i >= len(grid) or j < 0 or j >= len(grid[0]) or grid[i][j] == '0':
+                continue
+            grid[i][j] = '0'
+            stack.append((i, j - 1))
+            stack.append((i, j + 1))
+            stack.append((i - 1, j))
+            stack.append((i + 1, j))
 
     count = 0
     for i in range(len(grid)):
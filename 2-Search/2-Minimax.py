@@ -43,11 +43,89 @@ def minimax(level_order):
 
     return outputs
 
+# As in minimax(), the node at an odd level takes the minimum of its children unless maximize_root is set
+def is_max_node(index, maximize_root=False):
+    odd_level = (index + 1).bit_length() % 2 == 1
+    return odd_level == maximize_root
+
+def children(index, size):
+    return [child for child in (2 * index + 1, 2 * index + 2) if child < size]
+
+# Full minimax value of every node, backed up from the leaves
+def backed_up_values(level_order, maximize_root=False):
+    values = list(level_order)
+    for index in range(len(values) - 1, -1, -1):
+        kids = children(index, len(values))
+        if kids:
+            pick = max if is_max_node(index, maximize_root) else min
+            values[index] = pick(values[child] for child in kids)
+    return values
+
+# Same backup, one vectorized max/min per level; trees with millions of leaves evaluate in milliseconds
+def backed_up_values_numpy(level_order, maximize_root=False):
+    import numpy as np
+    values = np.array(level_order)
+    size = len(values)
+    depth = size.bit_length()
+    for level in range(depth - 1, 0, -1):
+        start, stop = (1 << (level - 1)) - 1, min((1 << level) - 1, size)
+        left_start = 2 * start + 1
+        if left_start >= size:
+            continue
+        last_parent = min(stop, (size - 2) // 2 + 1)
+        left = values[left_start:2 * last_parent + 1:2]
+        right = values[left_start + 1:2 * last_parent + 2:2]
+        pick = np.maximum if is_max_node(start, maximize_root) else np.minimum
+        merged = left.copy()
+        merged[:len(right)] = pick(left[:len(right)], right)
+        values[start:last_parent] = merged
+    return values
+
+def alphabeta(level_order, maximize_root=False, order_moves=True):
+    """
+    Alpha-beta search over the level-order array. Children are tried in the order suggested by
+    their stored values when order_moves is set. Returns the root value and the indices of the
+    subtrees that were never visited.
+    """
+    size = len(level_order)
+    pruned = []
+
+    def search(index, alpha, beta):
+        kids = children(index, size)
+        if not kids:
+            return level_order[index]
+        maximizing = is_max_node(index, maximize_root)
+        if order_moves:
+            kids.sort(key=lambda child: level_order[child], reverse=maximizing)
+        value = float('-inf') if maximizing else float('inf')
+        for position, child in enumerate(kids):
+            child_value = search(child, alpha, beta)
+            if maximizing:
+                value = max(value, child_value)
+                alpha = max(alpha, value)
+            else:
+                value = min(value, child_value)
+                beta = min(beta, value)
+            if alpha >= beta:
+                pruned.extend(kids[position + 1:])
+                break
+        return value
+
+    if size == 0:
+        return None, []
+    return search(0, float('-inf'), float('inf')), sorted(pruned)
+
 if __name__ == "__main__":
+    import sys
     input_str = input().strip()
     level_order = list(map(int, input_str.split()))
-    outputs = minimax(level_order)
-    if outputs:
-        print(' '.join(map(str, outputs)))
+    if len(sys.argv) > 1 and sys.argv[1] == "--alphabeta":
+        value, pruned = alphabeta(level_order)
+        print(value)
+        print(' '.join(map(str, pruned)) if pruned else 'No pruning')
     else:
-        print('Error')
+        outputs = minimax(level_order)
+        if outputs:
+            print(' '.join(map(str, outputs)))
+        else:
+            print('Error')
@@ -1,18 +1,66 @@
-import random
+import argparse
 import math
+import os
+import pickle
+import random
+import re
+from collections import OrderedDict, deque
+from multiprocessing import Manager, Pool
+from queue import Empty
 import numpy as np
-import matplotlib.pyplot as plt
 
-# Generate coordinates for 10 random cities
+# Number of random cities when no city file is given
 NUM_CITIES = 10
-cities = np.random.rand(NUM_CITIES, 2) * 100
 
-# Calculate the Euclidean distance matrix between cities
-distance_matrix = np.zeros((NUM_CITIES, NUM_CITIES))
-for i in range(NUM_CITIES):
-    for j in range(NUM_CITIES):
-        if i != j:
-            distance_matrix[i][j] = math.sqrt((cities[i][0] - cities[j][0]) ** 2 + (cities[i][1] - cities[j][1]) ** 2)
+def random_cities(num_cities=NUM_CITIES):
+    return np.random.rand(num_cities, 2) * 100
+
+# City coordinates from a TSPLIB file (NODE_COORD_SECTION) or a CSV of "x,y" / "id,x,y" rows;
+# fields may be separated by commas, semicolons or whitespace
+def load_cities(path):
+    with open(path, 'r') as f:
+        lines = [line.strip() for line in f if line.strip()]
+    coords = []
+    if any(line.startswith("NODE_COORD_SECTION") for line in lines):
+        start = next(i for i, line in enumerate(lines) if line.startswith("NODE_COORD_SECTION")) + 1
+        for line in lines[start:]:
+            if line == "EOF" or not line[0].isdigit():
+                break
+            _, x, y = line.split()[:3]
+            coords.append((float(x), float(y)))
+    else:
+        for line in lines:
+            fields = [field for field in re.split(r'[\s,;]+', line) if field]
+            try:
+                values = [float(field) for field in fields]
+            except ValueError:
+                continue  # header row
+            if len(values) >= 2:
+                coords.append(values[-2:])
+    if not coords:
+        raise ValueError(f"No city coordinates found in {path}")
+    return np.array(coords)
+
+# Calculate the Euclidean distance matrix between cities (broadcast over all pairs at once)
+def build_distance_matrix(cities):
+    diff = cities[:, np.newaxis, :] - cities[np.newaxis, :, :]
+    return np.sqrt((diff ** 2).sum(axis=-1))
+
+# Path lengths straight from the coordinates, for instances too large for a distance matrix
+def coordinate_fitness(population, cities):
+    points = cities[population]
+    return np.sqrt(((points - np.roll(points, -1, axis=1)) ** 2).sum(axis=-1)).sum(axis=1)
+
+MATRIX_LIMIT = 2000  # Largest instance that gets a full distance matrix
+
+def default_distance_matrix(cities):
+    return build_distance_matrix(cities) if len(cities) <= MATRIX_LIMIT else None
+
+# edge_length(a, b): lengths of the edges between two arrays of cities
+def make_edge_length(cities, distance_matrix=None):
+    if distance_matrix is not None:
+        return lambda a, b: distance_matrix[a, b]
+    return lambda a, b: np.sqrt(((cities[a] - cities[b]) ** 2).sum(axis=-1))
 
 # Parameter settings
 POP_SIZE = 100  # Population size
@@ -20,118 +68,678 @@ GENERATIONS = 500  # Number of generations
 CROSSOVER_RATE = 0.8  # Crossover probability
 MUTATION_RATE = 0.02  # Mutation probability
 ELITE_SIZE = 1  # Number of elites to keep
+SELECTION_METHOD = "tournament"  # "tournament" or "sus"
+TOURNAMENT_SIZE = 3  # Tours compared in each tournament
+MEMETIC = False  # Improve every offspring with 2-opt / Or-opt local search
+NEIGHBOURS = 8  # Candidate list size for the local search
+KICK_RATE = 0.5  # Memetic mode: probability of a double-bridge kick per child
+MIGRATION_INTERVAL = 20  # Island model: generations between migrations
+MIGRANTS = 2  # Island model: best tours sent to the next island
+MIGRATION_TIMEOUT = 600  # Island model: seconds to wait for migrants before giving up on the neighbour
+PARALLEL_ISLANDS = 1  # Island model: number of subpopulations, one process each
+CHECKPOINT_INTERVAL = 50  # Generations between checkpoints when a checkpoint file is given
+CACHE_SIZE = 10000  # Tour lengths kept in the fitness cache
+CACHE_WARMUP = 2000  # Lookups before the cache may decide it is not worth hashing for
+CACHE_MIN_HIT_RATE = 0.05  # Below this hit rate (after the warm-up) the cache is bypassed
+SWAP_DELTA_LIMIT = 4  # Mutated children with more swaps than this are re-scored instead of updated
+SWAP_DELTA_MIN_CITIES = 500  # Smaller tours are cheaper to re-score than to update swap by swap
 
-# Initialize the population
+# Bounded LRU cache of tour lengths keyed by canonical tour hash: the (wrapping) sum over the
+# tour's edges of key[a] * key[b], with a random 64-bit key per city. Every rotation and
+# reflection of a tour has the same edge set and therefore the same hash.
+class FitnessCache:
+    def __init__(self, maxsize=CACHE_SIZE, seed=0):
+        self.maxsize = maxsize
+        self.seed = seed
+        self.city_keys = None
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def keys(self, population):
+        num_cities = population.shape[1]
+        if self.city_keys is None or len(self.city_keys) != num_cities:
+            # A private generator, so hashing never disturbs the GA's random stream
+            rng = np.random.default_rng(self.seed)
+            self.city_keys = rng.integers(0, 2 ** 64, size=num_cities, dtype=np.uint64, endpoint=False)
+        keys = self.city_keys[population]
+        hashes = (keys[:, :-1] * keys[:, 1:]).sum(axis=1, dtype=np.uint64) + keys[:, -1] * keys[:, 0]
+        return hashes.tolist()
+
+    def get(self, key):
+        value = self.entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    # Hashing costs about as much as scoring, so a cache that rarely hits only slows the GA down
+    @property
+    def worthwhile(self):
+        return self.maxsize > 0 and (self.hits + self.misses < CACHE_WARMUP or self.hit_rate >= CACHE_MIN_HIT_RATE)
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def __repr__(self):
+        return (f"{len(self.entries)} tours cached, {self.hits} hits / {self.misses} misses "
+                f"({self.hit_rate:.1%} hit rate)")
+
+# Initialize the population: a (pop_size, num_cities) array, one random permutation per row
 def initialize_population(pop_size, num_cities):
-    population = []
-    for _ in range(pop_size):
-        individual = list(range(num_cities))
-        random.shuffle(individual)
-        population.append(individual)
-    return population
+    return np.argsort(np.random.rand(pop_size, num_cities), axis=1)
 
 # Calculate the path length
 def calculate_fitness(individual, distance_matrix):
-    total_distance = 0
-    for i in range(len(individual)):
-        from_city = individual[i]
-        to_city = individual[(i + 1) % len(individual)]
-        total_distance += distance_matrix[from_city][to_city]
-    return total_distance
-
-# Selection operation: Roulette wheel selection
-def selection(population, fitness_scores):
-    total_fitness = sum(fitness_scores)
-    selection_probs = [fitness / total_fitness for fitness in fitness_scores]
-    selected_index = np.random.choice(len(population), size=2, replace=False, p=selection_probs)
-    return [population[selected_index[0]], population[selected_index[1]]]
-
-# Crossover operation: Order crossover (OX)
-def crossover(parent1, parent2):
-    if random.random() < CROSSOVER_RATE:
-        start, end = sorted(random.sample(range(len(parent1)), 2))
-        child_p1 = parent1[start:end]
-        child_p2 = [item for item in parent2 if item not in child_p1]
-        child = child_p2[:start] + child_p1 + child_p2[start:]
-        return child
+    individual = np.asarray(individual)
+    return distance_matrix[individual, np.roll(individual, -1)].sum()
+
+# Path lengths of the whole population: one gather of every edge, summed per row
+def population_fitness(population, distance_matrix):
+    return distance_matrix[population, np.roll(population, -1, axis=1)].sum(axis=1)
+
+# Selection operation: draws all parent pairs at once, returns two index arrays
+# "tournament": the shortest of tournament_size random tours wins
+# "sus": stochastic universal sampling with weights 1 / length, so shorter tours are favoured
+def selection(fitness_scores, num_pairs, method=SELECTION_METHOD, tournament_size=TOURNAMENT_SIZE):
+    pop_size = len(fitness_scores)
+    if method == "tournament":
+        contestants = np.random.randint(pop_size, size=(2 * num_pairs, tournament_size))
+        winners = contestants[np.arange(2 * num_pairs), np.argmin(fitness_scores[contestants], axis=1)]
+    elif method == "sus":
+        cumulative = np.cumsum(1.0 / fitness_scores)
+        step = cumulative[-1] / (2 * num_pairs)
+        pointers = (np.random.rand() + np.arange(2 * num_pairs)) * step
+        winners = np.minimum(np.searchsorted(cumulative, pointers, side='right'), pop_size - 1)
+        np.random.shuffle(winners)
     else:
-        return parent1.copy()
+        raise ValueError(f"Unknown selection method: {method}")
+    return winners[:num_pairs], winners[num_pairs:]
+
+# Crossover operation: Order crossover (OX) on whole arrays of parents.
+# The child keeps parent1[start:end] in place and fills the other positions, left to right,
+# with the remaining cities in parent2's order. Each pair crosses over with probability rate.
+def crossover(parents1, parents2, rate=CROSSOVER_RATE):
+    num_children, num_cities = parents1.shape
+    bounds = np.sort(np.random.randint(num_cities + 1, size=(num_children, 2)), axis=1)
+    positions = np.arange(num_cities)
+    in_segment = (positions >= bounds[:, :1]) & (positions < bounds[:, 1:])
+    # Where each city sits in parent1, to test parent2's cities for membership of the segment
+    position_in_p1 = np.empty_like(parents1)
+    np.put_along_axis(position_in_p1, parents1, positions[np.newaxis, :].repeat(num_children, axis=0), axis=1)
+    p2_in_segment = np.take_along_axis(in_segment, np.take_along_axis(position_in_p1, parents2, axis=1), axis=1)
+    children = np.empty_like(parents1)
+    children[in_segment] = parents1[in_segment]
+    # Row-major order keeps each row's leftover cities together and in parent2's order
+    children[~in_segment] = parents2[~p2_in_segment]
+    skip = np.random.rand(num_children) >= rate
+    children[skip] = parents1[skip]
+    return children, skip
+
+# Change in tour length from swapping positions i and j of the given rows, from the (at most
+# four) edges around the two positions. Edge e joins positions e and e + 1.
+def swap_delta(population, rows, i, j, edge_length):
+    num_cities = population.shape[1]
+    edges = np.stack(((i - 1) % num_cities, i, (j - 1) % num_cities, j))
+    # Adjacent or equal positions share edges: count each edge once
+    distinct = np.ones(edges.shape, dtype=bool)
+    distinct[2] = (edges[2] != edges[0]) & (edges[2] != edges[1])
+    distinct[3] = (edges[3] != edges[0]) & (edges[3] != edges[1]) & (edges[3] != edges[2])
+    ends = np.concatenate((edges, (edges + 1) % num_cities))
+    before = population[rows, ends]
+    after = np.where(ends == i, population[rows, j], np.where(ends == j, population[rows, i], before))
+    lengths = edge_length(np.concatenate((after[:4], before[:4])), np.concatenate((after[4:], before[4:])))
+    return ((lengths[:4] - lengths[4:]) * distinct).sum(axis=0)
 
-# Mutation operation: Swap mutation
-def mutate(individual):
-    for swapped in range(len(individual)):
-        if random.random() < MUTATION_RATE:
-            swap_with = random.randint(0, len(individual) - 1)
-            individual[swapped], individual[swap_with] = individual[swap_with], individual[swapped]
-    return individual
+# Mutation operation: Swap mutation, every gene swaps with probability rate.
+# Swaps are applied in rounds of at most one per row so the fancy-indexed swaps never collide.
+# Given the rows' lengths, they are updated in place swap by swap with edge_length; rows with
+# more than SWAP_DELTA_LIMIT swaps (any swap without edge_length) are re-scored and get NaN.
+def mutate(population, fitness=None, edge_length=None, rate=MUTATION_RATE):
+    pop_size, num_cities = population.shape
+    swaps = np.random.binomial(num_cities, rate, size=pop_size)
+    if fitness is not None:
+        fitness[swaps > (SWAP_DELTA_LIMIT if edge_length is not None else 0)] = np.nan
+        tracked = ~np.isnan(fitness)
+    for round_ in range(swaps.max(initial=0)):
+        rows = np.nonzero(swaps > round_)[0]
+        i = np.random.randint(num_cities, size=len(rows))
+        j = np.random.randint(num_cities, size=len(rows))
+        if fitness is not None and edge_length is not None and round_ < SWAP_DELTA_LIMIT:
+            known = tracked[rows]
+            if known.any():
+                fitness[rows[known]] += swap_delta(population, rows[known], i[known], j[known], edge_length)
+        population[rows, i], population[rows, j] = population[rows, j], population[rows, i]
+    return population
 
 # Elitism
 def elitism(population, fitness_scores, elite_size):
     sorted_indices = np.argsort(fitness_scores)
-    elites = [population[i] for i in sorted_indices[:elite_size]]
-    return elites
+    return population[sorted_indices[:elite_size]].copy()
+
+# One generation: elites carried over, the rest bred in bulk.
+# Also returns, for every child, the index of the parent whose segment it kept, and the new
+# population's lengths where they are known without re-scoring (NaN elsewhere): elites keep
+# theirs, and children copied from a parent carry its length plus their swap deltas.
+# In memetic mode random swaps are left out: children are kicked with a double bridge instead.
+def next_generation(population, fitness_scores, memetic=False, edge_length=None,
+                    crossover_rate=CROSSOVER_RATE, mutation_rate=MUTATION_RATE, elite_size=ELITE_SIZE,
+                    selection_method=SELECTION_METHOD, tournament_size=TOURNAMENT_SIZE):
+    elites = elitism(population, fitness_scores, elite_size)
+    num_children = len(population) - len(elites)
+    parents1, parents2 = selection(fitness_scores, num_children, selection_method, tournament_size)
+    children, copied = crossover(population[parents1], population[parents2], crossover_rate)
+    children_fitness = np.where(copied, fitness_scores[parents1], np.nan)
+    if memetic:
+        for i in range(num_children):
+            if random.random() < KICK_RATE:
+                children[i], touched = double_bridge(children[i])
+                if not touched:
+                    continue
+                if edge_length is None:
+                    children_fitness[i] = np.nan
+                else:
+                    # A-B, C-D, E-F become A-D, E-B, C-F
+                    a, b, c, d, e, f = touched
+                    children_fitness[i] += (edge_length(np.array([a, e, c]), np.array([d, b, f])).sum()
+                                            - edge_length(np.array([a, c, e]), np.array([b, d, f])).sum())
+    else:
+        children = mutate(children, children_fitness, edge_length, mutation_rate)
+    new_fitness = np.concatenate((np.sort(fitness_scores)[:len(elites)], children_fitness))
+    return np.concatenate((elites, children)), parents1, new_fitness
+
+# Local search for the memetic mode: 2-opt and Or-opt moves with delta evaluation,
+# candidate lists of each city's k nearest neighbours and don't-look bits
+class LocalSearch:
+    def __init__(self, cities, k=NEIGHBOURS):
+        from scipy.spatial import cKDTree
+        self.cities = cities
+        self.x = cities[:, 0].tolist()
+        self.y = cities[:, 1].tolist()
+        k = min(k, len(cities) - 1)
+        _, neighbours = cKDTree(cities).query(cities, k + 1)
+        self.neighbours = [row[1:] for row in neighbours.reshape(len(cities), -1).tolist()]
+
+    def dist(self, a, b):
+        return math.hypot(self.x[a] - self.x[b], self.y[a] - self.y[b])
+
+    # Nearest-neighbour tour, looking at the candidate lists first
+    def nearest_neighbour_tour(self, start=0):
+        n = len(self.x)
+        unvisited = np.ones(n, dtype=bool)
+        tour = [start]
+        unvisited[start] = False
+        current = start
+        for _ in range(n - 1):
+            nearest = next((c for c in self.neighbours[current] if unvisited[c]), None)
+            if nearest is None:
+                remaining = np.nonzero(unvisited)[0]
+                gaps = self.cities[remaining] - self.cities[current]
+                nearest = int(remaining[np.argmin((gaps ** 2).sum(axis=1))])
+            tour.append(nearest)
+            unvisited[nearest] = False
+            current = nearest
+        return np.array(tour)
+
+    def _reverse(self, tour, pos, i, j):
+        # Reverse tour[i..j] (cyclic); reversing the complement instead gives the same tour
+        n = len(tour)
+        length = (j - i) % n + 1
+        if 2 * length > n:
+            i, j, length = (j + 1) % n, (i - 1) % n, n - length
+        if length < 2:
+            return
+        index = (i + np.arange(length)) % n
+        tour[index] = tour[index[::-1]]
+        pos[tour[index]] = index
+
+    def _move_segment(self, tour, pos, start, length, u, v, s1_next_to_u):
+        # Move tour[start:start+length] (cyclic) between the adjacent cities u -> v
+        n = len(tour)
+        segment = tour[(start + np.arange(length)) % n]
+        forward = (pos[u] - start) % n + 1
+        backward = (start + length - 1 - pos[v]) % n + 1
+        if forward <= backward:
+            index = (start + np.arange(forward)) % n
+            moved = segment if s1_next_to_u else segment[::-1]
+            values = np.concatenate((tour[index][length:], moved))
+        else:
+            index = (pos[v] + np.arange(backward)) % n
+            moved = segment if s1_next_to_u else segment[::-1]
+            values = np.concatenate((moved, tour[index][:-length]))
+        tour[index] = values
+        pos[values] = index
+
+    def improve(self, tour, active=None):
+        """
+        Applies improving 2-opt and Or-opt moves until none is left. Only cities in `active`
+        (default: all) start with their don't-look bit cleared; the endpoints of every changed
+        edge are cleared again. Returns the improved tour and the change in length.
+        """
+        tour = np.array(tour)
+        n = len(tour)
+        if n < 5:
+            return tour, 0.0
+        pos = np.empty(n, dtype=tour.dtype)
+        pos[tour] = np.arange(n)
+        dist, neighbours = self.dist, self.neighbours
+        queue = deque(range(n) if active is None else active)
+        queued = np.zeros(n, dtype=bool)
+        queued[list(queue)] = True
+        total_delta = 0.0
+
+        def wake(*cities_):
+            for c in cities_:
+                if not queued[c]:
+                    queued[c] = True
+                    queue.append(c)
+
+        while queue:
+            a = queue.popleft()
+            queued[a] = False
+            improved = False
+            # 2-opt, replacing the edge to a's successor and then to its predecessor
+            for direction in (1, -1):
+                pa = pos[a]
+                b = tour[(pa + direction) % n]
+                d_ab = dist(a, b)
+                for c in neighbours[a]:
+                    d_ac = dist(a, c)
+                    if d_ac >= d_ab:
+                        break
+                    d = tour[(pos[c] + direction) % n]
+                    if c == b or d == a:
+                        continue
+                    delta = d_ac + dist(b, d) - d_ab - dist(c, d)
+                    if delta < -1e-10:
+                        if direction == 1:
+                            self._reverse(tour, pos, pos[b], pos[c])
+                        else:
+                            self._reverse(tour, pos, pos[c], pos[b])
+                        total_delta += delta
+                        wake(a, b, c, d)
+                        improved = True
+                        break
+                if improved:
+                    break
+            if improved:
+                continue
+            # Or-opt: move the segment of 1-3 cities starting at a next to one of a's neighbours
+            for length in (1, 2, 3):
+                if length >= n - 3:
+                    break
+                start = pos[a]
+                s1, s2 = a, tour[(start + length - 1) % n]
+                p, nx = tour[(start - 1) % n], tour[(start + length) % n]
+                removed = dist(p, s1) + dist(s2, nx) - dist(p, nx)
+                in_segment = {tour[(start + i) % n] for i in range(length)}
+                for c in neighbours[s1]:
+                    d_c = dist(c, s1)
+                    if d_c >= removed:
+                        break
+                    if c in in_segment:
+                        continue
+                    best = None
+                    e = tour[(pos[c] + 1) % n]
+                    if c != p:
+                        # c -> s1 .. s2 -> e
+                        delta = d_c + dist(s2, e) - dist(c, e) - removed
+                        best = (delta, c, e, True)
+                    f = tour[(pos[c] - 1) % n]
+                    if c != nx:
+                        # f -> s2 .. s1 -> c
+                        delta = dist(f, s2) + d_c - dist(f, c) - removed
+                        if best is None or delta < best[0]:
+                            best = (delta, f, c, False)
+                    if best is not None and best[0] < -1e-10:
+                        delta, u, v, s1_next_to_u = best
+                        self._move_segment(tour, pos, start, length, u, v, s1_next_to_u)
+                        total_delta += delta
+                        wake(p, nx, s1, s2, u, v)
+                        improved = True
+                        break
+                if improved:
+                    break
+        return tour, total_delta
+
+# Double-bridge kick: cut the tour into four parts A B C D and reconnect them as A C B D.
+# Tours of fewer than four cities cannot be cut that way and come back unchanged, with no touched cities.
+def double_bridge(tour):
+    n = len(tour)
+    if n < 4:
+        return tour.copy(), []
+    i, j, k = sorted(random.sample(range(1, n), 3))
+    return np.concatenate((tour[:i], tour[j:k], tour[i:j], tour[k:])), [tour[i - 1], tour[i], tour[j - 1], tour[j], tour[k - 1], tour[k % n]]
+
+# Cities whose successor in the child differs from the parent's: the local search starts there
+def changed_cities(child, parent):
+    n = len(child)
+    successor_child = np.empty(n, dtype=child.dtype)
+    successor_child[child] = np.roll(child, -1)
+    successor_parent = np.empty(n, dtype=parent.dtype)
+    successor_parent[parent] = np.roll(parent, -1)
+    changed = np.nonzero(successor_child != successor_parent)[0]
+    return np.union1d(changed, successor_child[changed]).tolist()
+
+# Memetic start: one nearest-neighbour tour brought to a local optimum, the rest are kicked copies of it
+def initialize_memetic_population(pop_size, local_search):
+    tour, _ = local_search.improve(local_search.nearest_neighbour_tour(random.randrange(len(local_search.x))))
+    population = [tour]
+    while len(population) < pop_size:
+        kicked, touched = double_bridge(tour)
+        population.append(local_search.improve(kicked, touched)[0])
+    return np.array(population)
+
+# Checkpoints hold everything needed to continue a run: the population, the generation to run
+# next, the best tour so far, the history and both random generator states, plus the cities and
+# population size so a resumed run can be checked against them
+def save_checkpoint(path, state):
+    # Write to a temporary file first so an interrupted save never clobbers the last good checkpoint
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(state, f)
+    os.replace(tmp_path, path)
+
+def load_checkpoint(path):
+    with open(path, 'rb') as f:
+        return pickle.load(f)
 
 # Main genetic algorithm
-def genetic_algorithm():
-    population = initialize_population(POP_SIZE, NUM_CITIES)
-    best_distance = float('inf')
-    best_path = None
-    history = []
+# migrate(best_tours, best_distance) is called every migration_interval generations and returns
+# tours that replace the worst individuals (used by the island model below)
+def genetic_algorithm(cities=None, distance_matrix=None, pop_size=POP_SIZE,
+                      generations=GENERATIONS, memetic=MEMETIC, migrate=None,
+                      migration_interval=MIGRATION_INTERVAL, checkpoint=None,
+                      checkpoint_interval=CHECKPOINT_INTERVAL, resume=False, fitness_cache=None,
+                      crossover_rate=CROSSOVER_RATE, mutation_rate=MUTATION_RATE, elite_size=ELITE_SIZE,
+                      selection_method=SELECTION_METHOD, tournament_size=TOURNAMENT_SIZE):
+    if cities is None:
+        cities = random_cities()
+    if distance_matrix is None:
+        distance_matrix = default_distance_matrix(cities)
+    edge_length = make_edge_length(cities, distance_matrix) if len(cities) >= SWAP_DELTA_MIN_CITIES else None
+    if fitness_cache is None:
+        fitness_cache = FitnessCache()
+    if memetic:
+        local_search = LocalSearch(cities)
 
-    for generation in range(GENERATIONS):
+    if resume and checkpoint and os.path.exists(checkpoint):
+        state = load_checkpoint(checkpoint)
+        if 'cities' not in state or not np.array_equal(state['cities'], cities):
+            raise ValueError(f"Checkpoint {checkpoint} was written for different cities; "
+                             "resume with the same --cities file (or --num-cities and --seed)")
+        if state['pop_size'] != pop_size:
+            raise ValueError(f"Checkpoint {checkpoint} has a population of {state['pop_size']}, "
+                             f"not {pop_size}; resume with --pop-size {state['pop_size']}")
+        population = state['population']
+        first_generation = state['generation']
+        best_distance = state['best_distance']
+        best_path = state['best_path']
+        history = state['history']
+        random.setstate(state['random_state'])
+        np.random.set_state(state['numpy_state'])
+    else:
+        if memetic:
+            population = initialize_memetic_population(pop_size, local_search)
+        else:
+            population = initialize_population(pop_size, len(cities))
+        first_generation = 0
+        best_distance = float('inf')
+        best_path = None
+        history = []
+
+    def evaluate(population):
+        if distance_matrix is not None:
+            return population_fitness(population, distance_matrix)
+        return coordinate_fitness(population, cities)
+
+    # Fill in the lengths that are not known yet (NaN) from the cache, evaluating only the misses
+    def score(population, known=None):
+        fitness_scores = np.full(len(population), np.nan) if known is None else known
+        unknown = np.nonzero(np.isnan(fitness_scores))[0]
+        if len(unknown) == 0:
+            return fitness_scores
+        if not fitness_cache.worthwhile:
+            fitness_scores[unknown] = evaluate(population[unknown])
+            return fitness_scores
+        keys = fitness_cache.keys(population[unknown])
+        hit_rows, hit_values, missing_rows, missing_keys = [], [], [], []
+        for row, key in zip(unknown.tolist(), keys):
+            value = fitness_cache.get(key)
+            if value is None:
+                missing_rows.append(row)
+                missing_keys.append(key)
+            else:
+                hit_rows.append(row)
+                hit_values.append(value)
+        fitness_scores[hit_rows] = hit_values
+        if missing_rows:
+            values = evaluate(population[missing_rows])
+            fitness_scores[missing_rows] = values
+            for key, value in zip(missing_keys, values.tolist()):
+                fitness_cache.put(key, value)
+        return fitness_scores
+
+    known = None
+    for generation in range(first_generation, generations):
         # Calculate fitness
-        fitness_scores = [calculate_fitness(ind, distance_matrix) for ind in population]
+        fitness_scores = score(population, known)
+
+        # Island model: send the best tours on and let the incoming ones replace the worst
+        if migrate is not None and generation % migration_interval == migration_interval - 1:
+            order = np.argsort(fitness_scores)
+            incoming = migrate(population[order[:MIGRANTS]], float(fitness_scores[order[0]]))
+            if len(incoming):
+                replaced = order[len(order) - len(incoming):]
+                population[replaced] = incoming
+                fitness_scores[replaced] = np.nan
+                fitness_scores = score(population, fitness_scores)
         
         # Record the best individual
-        min_distance = min(fitness_scores)
-        if min_distance < best_distance:
-            best_distance = min_distance
-            best_path = population[fitness_scores.index(min_distance)]
+        best_index = int(np.argmin(fitness_scores))
+        if fitness_scores[best_index] < best_distance:
+            best_distance = float(fitness_scores[best_index])
+            best_path = population[best_index].tolist()
         
         history.append(best_distance)
         
-        # Elitism
-        elites = elitism(population, fitness_scores, ELITE_SIZE)
-        
-        # Generate a new population
-        new_population = elites.copy()
-        while len(new_population) < POP_SIZE:
-            parents = selection(population, fitness_scores)
-            child = crossover(parents[0], parents[1])
-            child = mutate(child)
-            new_population.append(child)
-        
+        # Elitism, selection, crossover and mutation for the whole population
+        new_population, parents, known = next_generation(population, fitness_scores, memetic, edge_length,
+                                                         crossover_rate, mutation_rate, elite_size,
+                                                         selection_method, tournament_size)
+
+        # Memetic mode: local search on each offspring, starting from the edges it does not share with its parent
+        if memetic:
+            num_elites = len(new_population) - len(parents)
+            for child, parent in enumerate(parents, start=num_elites):
+                active = changed_cities(new_population[child], population[parent])
+                if active:
+                    new_population[child], delta = local_search.improve(new_population[child], active)
+                    known[child] += delta
         population = new_population
+
+        if checkpoint and ((generation + 1) % checkpoint_interval == 0 or generation + 1 == generations):
+            save_checkpoint(checkpoint, {
+                'cities': cities,
+                'pop_size': pop_size,
+                'population': population,
+                'generation': generation + 1,
+                'best_distance': best_distance,
+                'best_path': best_path,
+                'history': history,
+                'random_state': random.getstate(),
+                'numpy_state': np.random.get_state(),
+            })
     
     return best_path, best_distance, history
 
-# Run the genetic algorithm
-best_path, best_distance, history = genetic_algorithm()
-
-# Output the results
-print("Best path length: {:.2f}".format(best_distance))
-print("Best path: ", best_path)
-
-# Visualize the results
-plt.figure(figsize=(10, 5))
-
-# Plot the city distribution
-plt.subplot(1, 2, 1)
-plt.scatter(cities[:, 0], cities[:, 1], color='red')
-for i, (x, y) in enumerate(cities):
-    plt.text(x + 1, y + 1, str(i), fontsize=12)
-# Plot the best path
-path = best_path + [best_path[0]]
-path_coords = cities[path]
-plt.plot(path_coords[:, 0], path_coords[:, 1], linestyle='-', color='blue')
-plt.title('Best Path Illustration')
-
-# Plot the fitness change
-plt.subplot(1, 2, 2)
-plt.plot(history, color='green')
-plt.title('Fitness Change')
-plt.xlabel('Generation')
-plt.ylabel('Path Length')
-
-plt.tight_layout()
-plt.show()
+# Island model: one subpopulation per process, each with its own seed; every migration_interval
+# generations each island passes its best tours to the next island in a ring.
+# An island that fails sends None on instead, so the islands waiting on it fail too rather than block.
+def run_island(task):
+    island, seed, cities, pop_size, generations, memetic, migration_interval, operators, inboxes, best, lock = task
+    random.seed(seed)
+    np.random.seed(seed)
+    distance_matrix = default_distance_matrix(cities)
+
+    # Shared best-so-far length across all islands
+    def publish(distance):
+        with lock:
+            if distance < best.value:
+                best.value = distance
+
+    def migrate(tours, distance):
+        publish(distance)
+        inboxes[(island + 1) % len(inboxes)].put(tours)
+        try:
+            incoming = inboxes[island].get(timeout=MIGRATION_TIMEOUT)
+        except Empty:
+            raise RuntimeError(f"island {island}: no migrants arrived within {MIGRATION_TIMEOUT} s") from None
+        if incoming is None:
+            raise RuntimeError(f"island {island}: the previous island failed")
+        return incoming
+
+    try:
+        best_path, best_distance, history = genetic_algorithm(cities, distance_matrix, pop_size, generations,
+                                                              memetic, migrate, migration_interval, **operators)
+    except BaseException:
+        inboxes[(island + 1) % len(inboxes)].put(None)
+        raise
+    publish(best_distance)
+    return best_path, best_distance, history
+
+# operators holds genetic_algorithm's operator settings (crossover_rate, mutation_rate, ...);
+# they travel with each island's task, since spawned workers do not see the parent's state
+def parallel_genetic_algorithm(cities=None, islands=None, pop_size=POP_SIZE, generations=GENERATIONS,
+                               memetic=MEMETIC, migration_interval=MIGRATION_INTERVAL, seed=0, **operators):
+    """
+    Returns the best tour over all islands, its length, and the merged convergence history
+    (per generation, the best length found by any island so far).
+    """
+    islands = islands or os.cpu_count() or 1
+    if cities is None:
+        cities = random_cities()
+    with Manager() as manager:
+        inboxes = [manager.Queue() for _ in range(islands)]
+        best = manager.Value('d', float('inf'))
+        lock = manager.Lock()
+        tasks = [(island, seed + island, cities, pop_size, generations, memetic, migration_interval,
+                  operators, inboxes, best, lock)
+                 for island in range(islands)]
+        with Pool(islands) as pool:
+            # Every island must run at the same time: they wait on each other at each migration
+            results = pool.map(run_island, tasks, chunksize=1)
+        best_distance = best.value
+    best_path = min(results, key=lambda result: result[1])[0]
+    history = np.minimum.reduce([np.array(result[2]) for result in results]).tolist()
+    return best_path, best_distance, history
+
+# matplotlib is only imported when a plot is requested, so headless runs do not need a display
+def plot_results(cities, best_path, history, output=None):
+    import matplotlib
+    if output:
+        matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    plt.figure(figsize=(10, 5))
+
+    # Plot the city distribution
+    plt.subplot(1, 2, 1)
+    plt.scatter(cities[:, 0], cities[:, 1], color='red', s=12 if len(cities) > 50 else None)
+    if len(cities) <= 50:
+        for i, (x, y) in enumerate(cities):
+            plt.text(x + 1, y + 1, str(i), fontsize=12)
+    # Plot the best path
+    path = best_path + [best_path[0]]
+    path_coords = cities[path]
+    plt.plot(path_coords[:, 0], path_coords[:, 1], linestyle='-', color='blue')
+    plt.title('Best Path Illustration')
+
+    # Plot the fitness change
+    plt.subplot(1, 2, 2)
+    plt.plot(history, color='green')
+    plt.title('Fitness Change')
+    plt.xlabel('Generation')
+    plt.ylabel('Path Length')
+
+    plt.tight_layout()
+    if output:
+        plt.savefig(output)
+    else:
+        plt.show()
+
+def main():
+    parser = argparse.ArgumentParser(description="Genetic algorithm for the travelling salesman problem")
+    parser.add_argument("--cities", metavar="FILE",
+                        help="city coordinates: x,y or id,x,y rows (comma, semicolon or space separated) or TSPLIB")
+    parser.add_argument("--num-cities", type=int, default=NUM_CITIES, help="random cities when no file is given")
+    parser.add_argument("--seed", type=int, help="random seed")
+    parser.add_argument("--pop-size", type=int, default=POP_SIZE)
+    parser.add_argument("--generations", type=int, default=GENERATIONS)
+    parser.add_argument("--crossover-rate", type=float, default=CROSSOVER_RATE)
+    parser.add_argument("--mutation-rate", type=float, default=MUTATION_RATE)
+    parser.add_argument("--elite-size", type=int, default=ELITE_SIZE)
+    parser.add_argument("--selection", choices=["tournament", "sus"], default=SELECTION_METHOD)
+    parser.add_argument("--tournament-size", type=int, default=TOURNAMENT_SIZE)
+    parser.add_argument("--memetic", action="store_true", default=MEMETIC,
+                        help="improve every offspring with 2-opt/Or-opt local search")
+    parser.add_argument("--islands", type=int, default=PARALLEL_ISLANDS,
+                        help="run the island model with this many processes")
+    parser.add_argument("--cache-size", type=int, default=CACHE_SIZE,
+                        help="tour lengths kept in the fitness cache (0 disables it)")
+    parser.add_argument("--checkpoint", metavar="PATH", help="save the run state to PATH periodically")
+    parser.add_argument("--checkpoint-interval", type=int, default=CHECKPOINT_INTERVAL)
+    parser.add_argument("--resume", action="store_true", help="continue from the checkpoint if it exists")
+    parser.add_argument("--plot", action="store_true", help="show the best path and fitness history")
+    parser.add_argument("--plot-file", metavar="PATH", help="save the plot to PATH instead of showing it")
+    args = parser.parse_args()
+
+    operators = dict(crossover_rate=args.crossover_rate, mutation_rate=args.mutation_rate,
+                     elite_size=args.elite_size, selection_method=args.selection,
+                     tournament_size=args.tournament_size)
+
+    if args.seed is not None:
+        random.seed(args.seed)
+        np.random.seed(args.seed)
+    cities = load_cities(args.cities) if args.cities else random_cities(args.num_cities)
+
+    # Run the genetic algorithm (more than one island runs the island model)
+    fitness_cache = None
+    if args.islands > 1:
+        if args.checkpoint:
+            parser.error("--checkpoint is only supported for single-population runs")
+        best_path, best_distance, history = parallel_genetic_algorithm(
+            cities, args.islands, args.pop_size, args.generations, args.memetic,
+            seed=args.seed or 0, **operators)
+    else:
+        fitness_cache = FitnessCache(args.cache_size)
+        try:
+            best_path, best_distance, history = genetic_algorithm(
+                cities, None, args.pop_size, args.generations, args.memetic,
+                checkpoint=args.checkpoint, checkpoint_interval=args.checkpoint_interval,
+                resume=args.resume, fitness_cache=fitness_cache, **operators)
+        except ValueError as e:
+            parser.error(str(e))
+
+    # Output the results
+    print("Best path length: {:.2f}".format(best_distance))
+    print("Best path: ", best_path)
+    if fitness_cache is not None:
+        print("Fitness cache:", fitness_cache)
+
+    # Visualize the results
+    if args.plot or args.plot_file:
+        plot_results(cities, best_path, history, args.plot_file)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+import random
+import time
+
+class GameState:
+    """
+    Interface the search engine expects. Scores are negamax-style: evaluate() is from the point
+    of view of the player to move. zobrist_key() should be kept up to date incrementally in
+    apply/undo, e.g. with the Zobrist class below.
+    """
+    def legal_moves(self):
+        raise NotImplementedError
+
+    def apply(self, move):
+        raise NotImplementedError
+
+    def undo(self, move):
+        raise NotImplementedError
+
+    def is_terminal(self):
+        raise NotImplementedError
+
+    def evaluate(self):
+        raise NotImplementedError
+
+    def zobrist_key(self):
+        raise NotImplementedError
+
+class Zobrist:
+    """One random 64-bit key per (feature, value); a position's key is the XOR of its features' keys."""
+    def __init__(self, features, values, seed=0):
+        rng = random.Random(seed)
+        self.keys = [[rng.getrandbits(64) for _ in range(values)] for _ in range(features)]
+        self.side_to_move = rng.getrandbits(64)
+
+    def key(self, feature, value):
+        return self.keys[feature][value]
+
+EXACT, LOWER, UPPER = 0, 1, 2
+
+class TranspositionTable:
+    """
+    Fixed number of slots indexed by the low bits of the Zobrist key. A slot is replaced when it
+    is empty, left over from an earlier search, or holds a shallower result.
+    """
+    def __init__(self, size_bits=20):
+        self.mask = (1 << size_bits) - 1
+        self.slots = [None] * (1 << size_bits)
+        self.generation = 0
+        self.hits = 0
+        self.stores = 0
+
+    def new_search(self):
+        self.generation += 1
+
+    def probe(self, key):
+        entry = self.slots[key & self.mask]
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            return entry
+        return None
+
+    def store(self, key, depth, value, flag, move):
+        index = key & self.mask
+        entry = self.slots[index]
+        if entry is None or entry[0] == key or entry[5] != self.generation or depth >= entry[1]:
+            self.slots[index] = (key, depth, value, flag, move, self.generation)
+            self.stores += 1
+
+class SearchTimeout(Exception):
+    pass
+
+class SearchStats:
+    def __init__(self):
+        self.nodes = 0
+        self.depth = 0
+        self.elapsed = 0.0
+        self.tt_hits = 0
+
+    @property
+    def nodes_per_second(self):
+        return self.nodes / self.elapsed if self.elapsed > 0 else 0.0
+
+    def __repr__(self):
+        return (f"depth {self.depth}, {self.nodes} nodes in {self.elapsed:.3f}s "
+                f"({self.nodes_per_second:.0f} nodes/s), {self.tt_hits} TT hits")
+
+class GameSearch:
+    """Iterative-deepening alpha-beta (negamax) with a transposition table and killer/history move ordering."""
+    INF = float('inf')
+    EXHAUSTED = 1 << 30  # TT depth of a subtree searched to the end of the game
+
+    def __init__(self, tt_size_bits=20, check_every=1024):
+        self.tt = TranspositionTable(tt_size_bits)
+        self.check_every = check_every
+        self.killers = []
+        self.history = {}
+        self.stats = SearchStats()
+        self.deadline = None
+        self.horizon_hits = 0
+
+    def _order(self, moves, ply, tt_move):
+        killers = self.killers[ply] if ply < len(self.killers) else ()
+
+        def priority(move):
+            if move == tt_move:
+                return (2, 0)
+            if move in killers:
+                return (1, 0)
+            return (0, self.history.get(move, 0))
+
+        return sorted(moves, key=priority, reverse=True)
+
+    def _record_cutoff(self, move, depth, ply):
+        while len(self.killers) <= ply:
+            self.killers.append([])
+        killers = self.killers[ply]
+        if move not in killers:
+            killers.insert(0, move)
+            del killers[2:]
+        self.history[move] = self.history.get(move, 0) + depth * depth
+
+    def _negamax(self, state, depth, alpha, beta, ply):
+        self.stats.nodes += 1
+        if self.deadline is not None and self.stats.nodes % self.check_every == 0:
+            if time.perf_counter() > self.deadline:
+                raise SearchTimeout()
+        if state.is_terminal():
+            return state.evaluate(), None
+        if depth == 0:
+            self.horizon_hits += 1
+            return state.evaluate(), None
+
+        key = state.zobrist_key()
+        alpha_orig = alpha
+        entry = self.tt.probe(key)
+        tt_move = None
+        if entry is not None:
+            _, entry_depth, value, flag, tt_move, _ = entry
+            if entry_depth >= depth:
+                if entry_depth != self.EXHAUSTED:
+                    self.horizon_hits += 1
+                if flag == EXACT:
+                    return value, tt_move
+                if flag == LOWER:
+                    alpha = max(alpha, value)
+                elif flag == UPPER:
+                    beta = min(beta, value)
+                if alpha >= beta:
+                    return value, tt_move
+
+        horizon_hits = self.horizon_hits
+        best_value, best_move = -self.INF, None
+        for move in self._order(state.legal_moves(), ply, tt_move):
+            state.apply(move)
+            try:
+                value = -self._negamax(state, depth - 1, -beta, -alpha, ply + 1)[0]
+            finally:
+                state.undo(move)
+            if value > best_value:
+                best_value, best_move = value, move
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                self._record_cutoff(move, depth, ply)
+                break
+
+        if best_move is None:
+            return state.evaluate(), None
+        flag = UPPER if best_value <= alpha_orig else LOWER if best_value >= beta else EXACT
+        if self.horizon_hits == horizon_hits:
+            depth = self.EXHAUSTED
+        self.tt.store(key, depth, best_value, flag, best_move)
+        return best_value, best_move
+
+    def search(self, state, max_depth=64, time_limit=None):
+        """
+        Deepens one ply at a time until max_depth or the time budget (seconds) runs out and
+        returns (best_move, value) from the last completed depth. If time runs out before depth 1
+        completes, the first legal move in search order is returned with value None, so a legal
+        move is always returned for a non-terminal state. Statistics are in self.stats.
+        """
+        self.stats = SearchStats()
+        self.tt.new_search()
+        hits_before = self.tt.hits
+        start = time.perf_counter()
+        self.deadline = start + time_limit if time_limit is not None else None
+        best_move, best_value = None, None
+        try:
+            for depth in range(1, max_depth + 1):
+                self.horizon_hits = 0
+                value, move = self._negamax(state, depth, -self.INF, self.INF, 0)
+                best_move, best_value = move, value
+                self.stats.depth = depth
+                # Nothing was cut off by the depth limit: a deeper search cannot change the result
+                if move is None or self.horizon_hits == 0:
+                    break
+        except SearchTimeout:
+            if best_move is None and not state.is_terminal():
+                best_move = next(iter(self._order(state.legal_moves(), 0, None)), None)
+        finally:
+            self.deadline = None
+            self.stats.elapsed = time.perf_counter() - start
+            self.stats.tt_hits = self.tt.hits - hits_before
+        return best_move, best_value
+
+# Example game: tic-tac-toe, board cells 0..8, players 1 and 2
+class TicTacToe(GameState):
+    LINES = [(0, 1, 2), (3, 4, 5), (6, 7, 8), (0, 3, 6), (1, 4, 7), (2, 5, 8), (0, 4, 8), (2, 4, 6)]
+    zobrist = Zobrist(9, 3)
+
+    def __init__(self):
+        self.board = [0] * 9
+        self.player = 1
+        self.key = 0
+
+    def winner(self):
+        for a, b, c in self.LINES:
+            if self.board[a] and self.board[a] == self.board[b] == self.board[c]:
+                return self.board[a]
+        return 0
+
+    def legal_moves(self):
+        if self.winner():
+            return []
+        return [cell for cell in range(9) if self.board[cell] == 0]
+
+    def apply(self, move):
+        self.board[move] = self.player
+        self.key ^= self.zobrist.key(move, self.player) ^ self.zobrist.side_to_move
+        self.player = 3 - self.player
+
+    def undo(self, move):
+        self.player = 3 - self.player
+        self.key ^= self.zobrist.key(move, self.player) ^ self.zobrist.side_to_move
+        self.board[move] = 0
+
+    def is_terminal(self):
+        return self.winner() != 0 or all(self.board)
+
+    def evaluate(self):
+        winner = self.winner()
+        if winner == 0:
+            return 0
+        return 1 if winner == self.player else -1
+
+    def zobrist_key(self):
+        return self.key
+
+if __name__ == "__main__":
+    game = TicTacToe()
+    engine = GameSearch(tt_size_bits=16)
+    while not game.is_terminal():
+        move, value = engine.search(game, time_limit=1.0)
+        print(f"Player {game.player} plays {move} (value {value}); {engine.stats}")
+        game.apply(move)
+    print(["Draw", "Player 1 wins", "Player 2 wins"][game.winner()])
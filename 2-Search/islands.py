@@ -0,0 +1,488 @@
+import argparse
+import os
+from collections import deque
+from multiprocessing import Pool
+from multiprocessing.shared_memory import SharedMemory
+import numpy as np
+
+# Accepts the list-of-lists of "0"/"1" strings used by 1-1-DFS.py / 1-2-BFS.py, or any 2-D array
+def as_land(grid):
+    grid = np.asarray(grid)
+    if grid.dtype.kind in 'US':
+        return grid == '1'
+    return grid != 0
+
+def parse_row(line):
+    line = line.strip()
+    return np.array(line.split() if ' ' in line else list(line), dtype=np.uint8)
+
+def load_grid(path):
+    # .npy files are memory-mapped; text files hold one row of 0/1 characters per line
+    if path.endswith('.npy'):
+        return np.load(path, mmap_mode='r')
+    with open(path, 'r') as f:
+        rows = [parse_row(line) for line in f if line.strip()]
+    return np.array(rows, dtype=np.uint8)
+
+def iter_rows(path, width=None):
+    # Rows one at a time: .npy and raw uint8 rasters (given their width) through a memory map, text line by line
+    if path.endswith('.npy'):
+        yield from np.load(path, mmap_mode='r')
+    elif width is not None:
+        yield from np.memmap(path, dtype=np.uint8, mode='r').reshape(-1, width)
+    else:
+        with open(path, 'r') as f:
+            for line in f:
+                if line.strip():
+                    yield parse_row(line)
+
+class UnionFind:
+    """Union-find over integer ids 0..n-1 stored in a NumPy parent array; a root is its own smallest member."""
+    def __init__(self, n):
+        self.parent = np.arange(n, dtype=np.int32 if n < 2 ** 31 else np.int64)
+
+    def compress(self):
+        # Pointer jumping until every id points straight at its root
+        parent = self.parent
+        while True:
+            grandparent = parent[parent]
+            if np.array_equal(grandparent, parent):
+                break
+            parent = grandparent
+        self.parent = parent
+        return parent
+
+    def union_pairs(self, a, b):
+        a = np.asarray(a, dtype=self.parent.dtype)
+        b = np.asarray(b, dtype=self.parent.dtype)
+        while a.size:
+            parent = self.compress()
+            ra, rb = parent[a], parent[b]
+            differ = ra != rb
+            if not differ.any():
+                break
+            a, b, ra, rb = a[differ], b[differ], ra[differ], rb[differ]
+            # Hook the larger root under the smaller one; minimum.at settles competing hooks
+            np.minimum.at(self.parent, np.maximum(ra, rb), np.minimum(ra, rb))
+
+    def roots(self):
+        return self.compress()
+
+def _adjacent_pairs(upper, lower, connectivity):
+    # Provisional labels of vertically (and for 8-connectivity, diagonally) touching land cells
+    offsets = [(slice(None), slice(None))]
+    if connectivity == 8:
+        offsets += [(slice(None, -1), slice(1, None)), (slice(1, None), slice(None, -1))]
+    elif connectivity != 4:
+        raise ValueError("connectivity must be 4 or 8")
+    pairs_a, pairs_b = [], []
+    for up, down in offsets:
+        a = upper[:, up]
+        b = lower[:, down]
+        touching = (a > 0) & (b > 0)
+        # Neighbouring columns of the same two runs give the same pair; keep the first only
+        touching[:, 1:] &= (a[:, 1:] != a[:, :-1]) | (b[:, 1:] != b[:, :-1])
+        pairs_a.append(a[touching])
+        pairs_b.append(b[touching])
+    return np.concatenate(pairs_a), np.concatenate(pairs_b)
+
+def label_islands(grid, connectivity=4):
+    """
+    Two-pass scan-line labeling. Pass one gives every horizontal run of land a provisional label
+    and unions the runs that touch across rows; pass two maps each run to its island.
+    Returns (labels, count, sizes): labels is 0 for water and 1..count for land,
+    sizes[i] is the area of island i + 1.
+    """
+    land = as_land(grid)
+    if land.ndim != 2:
+        raise ValueError("grid must be two-dimensional")
+    if land.size == 0:
+        return np.zeros(land.shape, dtype=np.int32), 0, np.zeros(0, dtype=np.int64)
+    starts = land.copy()
+    starts[:, 1:] &= ~land[:, :-1]
+    run_ids = np.cumsum(starts.ravel(), dtype=np.int32).reshape(land.shape)
+    run_ids[~land] = 0
+    num_runs = int(starts.sum())
+    del starts
+
+    union_find = UnionFind(num_runs + 1)
+    union_find.union_pairs(*_adjacent_pairs(run_ids[:-1], run_ids[1:], connectivity))
+    roots = union_find.roots()
+
+    is_root = roots == np.arange(num_runs + 1)
+    is_root[0] = False
+    island_of_root = np.cumsum(is_root, dtype=np.int32)
+    island_of_run = island_of_root[roots]
+    island_of_run[0] = 0
+    count = int(island_of_root[-1])
+
+    labels = island_of_run[run_ids]
+    sizes = np.bincount(labels.ravel(), minlength=count + 1)[1:]
+    return labels, count, sizes
+
+def count_islands(grid, connectivity=4):
+    return label_islands(grid, connectivity)[1]
+
+def _row_runs(row):
+    land = as_land(row)
+    starts = land.copy()
+    starts[1:] &= ~land[:-1]
+    run_ids = np.cumsum(starts, dtype=np.int32)
+    run_ids[~land] = 0
+    return run_ids, int(starts.sum())
+
+def stream_island_areas(rows, connectivity=4):
+    """
+    Out-of-core labeling: consumes the grid one row at a time and yields the area of each
+    island as soon as no later row can reach it. Only the previous row's labels and the areas
+    of the components still open (at most one per column) are kept in memory.
+    """
+    prev = None
+    open_areas = np.zeros(1, dtype=np.int64)
+    for row in rows:
+        run_ids, num_runs = _row_runs(np.asarray(row))
+        if prev is None:
+            prev = np.zeros(run_ids.shape, dtype=np.int32)
+        elif prev.shape != run_ids.shape:
+            raise ValueError("all rows must have the same width")
+        # Nodes 1..k are the open components, k+1..k+m the runs of this row
+        k = len(open_areas) - 1
+        nodes = np.where(run_ids > 0, run_ids + k, 0).astype(np.int32)
+        union_find = UnionFind(k + num_runs + 1)
+        union_find.union_pairs(*_adjacent_pairs(prev[None, :], nodes[None, :], connectivity))
+        roots = union_find.roots()
+
+        node_area = np.zeros(k + num_runs + 1, dtype=np.int64)
+        node_area[:k + 1] = open_areas
+        node_area[k + 1:] = np.bincount(run_ids, minlength=num_runs + 1)[1:]
+        area = np.bincount(roots, weights=node_area, minlength=len(roots)).astype(np.int64)
+        continues = np.zeros(len(roots), dtype=bool)
+        continues[roots[k + 1:]] = True
+
+        for root in np.unique(roots[1:k + 1]):
+            if not continues[root]:
+                yield int(area[root])
+
+        is_open = continues & (roots == np.arange(len(roots)))
+        new_id = np.cumsum(is_open, dtype=np.int32)
+        open_areas = np.concatenate(([0], area[is_open]))
+        prev = new_id[roots[nodes]]
+        prev[nodes == 0] = 0
+    for area in open_areas[1:]:
+        yield int(area)
+
+def count_islands_streaming(rows, connectivity=4):
+    areas = list(stream_island_areas(rows, connectivity))
+    return len(areas), areas
+
+class DynamicIslands:
+    """
+    Island count kept current under single-cell land/water flips. Cells map to union-find
+    nodes; adding land unions it with its neighbours. Removing land may split an island, so
+    searches from the removed cell's neighbours run in lockstep and stop once they have all met;
+    a search that runs dry first is a split-off piece and moves to a fresh node. The work is
+    bounded by the smaller pieces, not by the size of the island. Nodes no longer reachable
+    from any cell are reused, so the node table stays within twice the number of cells.
+    """
+    def __init__(self, grid, connectivity=4):
+        labels, count, sizes = label_islands(grid, connectivity)
+        self.rows, self.cols = labels.shape
+        self.connectivity = connectivity
+        if connectivity == 4:
+            self.steps = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+        else:
+            self.steps = [(di, dj) for di in (-1, 0, 1) for dj in (-1, 0, 1) if di or dj]
+        self.node = labels.astype(np.int64).ravel() - 1
+        self.parent = list(range(count))
+        self.size = sizes.tolist()
+        self.free = []
+        self.count = count
+
+    def _find(self, x):
+        parent = self.parent
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    def _new_node(self, size):
+        if not self.free and len(self.parent) >= 2 * len(self.node):
+            self._reclaim()
+        if self.free:
+            node = self.free.pop()
+            self.parent[node] = node
+            self.size[node] = size
+            return node
+        self.parent.append(len(self.parent))
+        self.size.append(size)
+        return len(self.parent) - 1
+
+    def _reclaim(self):
+        # Point every land cell straight at its root: all other nodes are then unreferenced.
+        # Roots keep their ids, so island_id is unaffected.
+        land = np.nonzero(self.node >= 0)[0]
+        roots = [self._find(node) for node in self.node[land].tolist()]
+        self.node[land] = roots
+        live = np.zeros(len(self.parent), dtype=bool)
+        live[roots] = True
+        self.free = np.nonzero(~live)[0].tolist()
+
+    def _union(self, a, b):
+        ra, rb = self._find(a), self._find(b)
+        if ra == rb:
+            return ra
+        if self.size[ra] < self.size[rb]:
+            ra, rb = rb, ra
+        self.parent[rb] = ra
+        self.size[ra] += self.size[rb]
+        self.count -= 1
+        return ra
+
+    def _neighbours(self, cell):
+        i, j = divmod(cell, self.cols)
+        for di, dj in self.steps:
+            ni, nj = i + di, j + dj
+            if 0 <= ni < self.rows and 0 <= nj < self.cols:
+                yield ni * self.cols + nj
+
+    def is_land(self, i, j):
+        return self.node[i * self.cols + j] >= 0
+
+    def island_id(self, i, j):
+        # Root node of the cell's island (stable until the island merges or splits), None for water
+        node = self.node[i * self.cols + j]
+        return None if node < 0 else self._find(int(node))
+
+    def island_size(self, i, j):
+        root = self.island_id(i, j)
+        return 0 if root is None else self.size[root]
+
+    def add_land(self, i, j):
+        cell = i * self.cols + j
+        if self.node[cell] >= 0:
+            return
+        node = self._new_node(1)
+        self.node[cell] = node
+        self.count += 1
+        for neighbour in self._neighbours(cell):
+            if self.node[neighbour] >= 0:
+                node = self._union(node, int(self.node[neighbour]))
+
+    def remove_land(self, i, j):
+        self.remove_cells([(i, j)])
+
+    def remove_cells(self, cells):
+        # Remove a batch of land cells, then repair each affected island once
+        seeds = {}
+        for i, j in cells:
+            cell = i * self.cols + j
+            if self.node[cell] < 0:
+                continue
+            root = self._find(int(self.node[cell]))
+            self.node[cell] = -1
+            self.size[root] -= 1
+            seeds.setdefault(root, set()).discard(cell)
+            for neighbour in self._neighbours(cell):
+                if self.node[neighbour] >= 0:
+                    seeds[root].add(neighbour)
+        for root, starts in seeds.items():
+            starts = [cell for cell in starts if self.node[cell] >= 0]
+            if not starts:
+                self.count -= 1
+                continue
+            self._split(root, starts)
+
+    def _split(self, root, starts):
+        owner = {}
+        group = list(range(len(starts)))
+        frontiers = []
+        pieces = []
+
+        def find_group(g):
+            while group[g] != g:
+                group[g] = group[group[g]]
+                g = group[g]
+            return g
+
+        for g, cell in enumerate(starts):
+            if cell in owner:
+                group[g] = find_group(owner[cell])
+                frontiers.append(deque())
+            else:
+                owner[cell] = g
+                frontiers.append(deque([cell]))
+                pieces.append(g)
+        active = {find_group(g) for g in range(len(starts))}
+        while len(active) > 1:
+            for g in list(active):
+                if g not in active or len(active) == 1:
+                    continue
+                frontier = frontiers[g]
+                if not frontier:
+                    # This search ran dry without meeting the others: it is a separate island
+                    active.discard(g)
+                    piece = [cell for cell, h in owner.items() if find_group(h) == g]
+                    node = self._new_node(len(piece))
+                    for cell in piece:
+                        self.node[cell] = node
+                    self.size[root] -= len(piece)
+                    self.count += 1
+                    continue
+                cell = frontier.popleft()
+                for neighbour in self._neighbours(cell):
+                    if self.node[neighbour] < 0:
+                        continue
+                    if neighbour not in owner:
+                        owner[neighbour] = g
+                        frontier.append(neighbour)
+                        continue
+                    other = find_group(owner[neighbour])
+                    if other != g:
+                        # Two searches met: they explore the same piece from now on
+                        group[other] = g
+                        frontier.extend(frontiers[other])
+                        frontiers[other].clear()
+                        active.discard(other)
+
+    def apply(self, updates):
+        # updates: iterable of (i, j, is_land); consecutive removals are repaired together
+        removals = []
+        for i, j, land in updates:
+            if land:
+                if removals:
+                    self.remove_cells(removals)
+                    removals = []
+                self.add_land(i, j)
+            else:
+                removals.append((i, j))
+        if removals:
+            self.remove_cells(removals)
+
+def _attach(name, shape, dtype):
+    shm = SharedMemory(name=name)
+    return shm, np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+def _label_tile(task):
+    # Worker: label rows [start, stop) of the shared grid into the shared label array
+    grid_name, labels_name, shape, start, stop, connectivity = task
+    grid_shm, grid = _attach(grid_name, shape, np.uint8)
+    labels_shm, labels = _attach(labels_name, shape, np.int32)
+    try:
+        tile_labels, count, sizes = label_islands(grid[start:stop], connectivity)
+        labels[start:stop] = tile_labels
+        return count, sizes
+    finally:
+        del grid, labels
+        grid_shm.close()
+        labels_shm.close()
+
+def _relabel_tile(task):
+    # Worker: replace the tile's local labels by final island ids
+    labels_name, mapping_name, shape, mapping_size, start, stop, offset = task
+    labels_shm, labels = _attach(labels_name, shape, np.int32)
+    mapping_shm, mapping = _attach(mapping_name, (mapping_size,), np.int32)
+    try:
+        tile = labels[start:stop]
+        land = tile > 0
+        tile[land] = mapping[tile[land] + offset]
+    finally:
+        del labels, mapping, tile
+        labels_shm.close()
+        mapping_shm.close()
+
+def label_islands_parallel(grid, connectivity=4, workers=None, tiles=None, return_labels=True):
+    """
+    Splits the grid into horizontal bands, labels each band in its own process over shared
+    memory, then unions the islands that touch across band edges. Same result as label_islands;
+    labels is None when return_labels is False (which skips the relabeling pass).
+    """
+    land = as_land(grid)
+    if land.ndim != 2:
+        raise ValueError("grid must be two-dimensional")
+    if land.size == 0:
+        labels = np.zeros(land.shape, dtype=np.int32) if return_labels else None
+        return labels, 0, np.zeros(0, dtype=np.int64)
+    rows, cols = land.shape
+    workers = workers or os.cpu_count() or 1
+    tiles = max(1, min(tiles or workers, rows))
+    bounds = np.linspace(0, rows, tiles + 1).astype(int)
+    bands = [(int(a), int(b)) for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+
+    grid_shm = SharedMemory(create=True, size=max(1, land.size))
+    labels_shm = SharedMemory(create=True, size=max(1, land.size * 4))
+    mapping_shm = None
+    try:
+        shared_grid = np.ndarray(land.shape, dtype=np.uint8, buffer=grid_shm.buf)
+        shared_grid[:] = land
+        shared_labels = np.ndarray(land.shape, dtype=np.int32, buffer=labels_shm.buf)
+        with Pool(min(workers, len(bands))) as pool:
+            results = pool.map(_label_tile, [(grid_shm.name, labels_shm.name, land.shape, start, stop, connectivity)
+                                             for start, stop in bands])
+            counts = [count for count, _ in results]
+            offsets = np.concatenate(([0], np.cumsum(counts)))
+            total = int(offsets[-1])
+
+            # Global merge: union provisional labels that touch across each band edge
+            union_find = UnionFind(total + 1)
+            pairs_a, pairs_b = [], []
+            for i in range(1, len(bands)):
+                edge = bands[i][0]
+                upper = np.where(shared_labels[edge - 1] > 0, shared_labels[edge - 1] + offsets[i - 1], 0)
+                lower = np.where(shared_labels[edge] > 0, shared_labels[edge] + offsets[i], 0)
+                a, b = _adjacent_pairs(upper[None, :], lower[None, :], connectivity)
+                pairs_a.append(a)
+                pairs_b.append(b)
+            if pairs_a:
+                union_find.union_pairs(np.concatenate(pairs_a), np.concatenate(pairs_b))
+            roots = union_find.roots()
+
+            is_root = roots == np.arange(total + 1)
+            is_root[0] = False
+            island_of_root = np.cumsum(is_root, dtype=np.int32)
+            mapping = island_of_root[roots]
+            count = int(island_of_root[-1])
+            tile_sizes = np.concatenate([[0]] + [sizes for _, sizes in results])
+            sizes = np.bincount(mapping, weights=tile_sizes, minlength=count + 1)[1:].astype(np.int64)
+
+            labels = None
+            if return_labels:
+                mapping_shm = SharedMemory(create=True, size=max(1, mapping.nbytes))
+                np.ndarray(mapping.shape, dtype=np.int32, buffer=mapping_shm.buf)[:] = mapping
+                pool.map(_relabel_tile, [(labels_shm.name, mapping_shm.name, land.shape, len(mapping),
+                                          start, stop, int(offsets[i]))
+                                         for i, (start, stop) in enumerate(bands)])
+                labels = shared_labels.copy()
+        del shared_grid, shared_labels
+        return labels, count, sizes
+    finally:
+        for shm in (grid_shm, labels_shm, mapping_shm):
+            if shm is not None:
+                shm.close()
+                shm.unlink()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Count islands of 1s in a grid file (text, .npy or raw uint8)")
+    parser.add_argument("grid_file")
+    parser.add_argument("--connectivity", type=int, choices=(4, 8), default=4)
+    parser.add_argument("--stream", action="store_true", help="read row by row; memory grows with the width only")
+    parser.add_argument("--width", type=int, default=None, help="row width of a raw uint8 raster file")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="label tiles in this many processes (default: in-process)")
+    args = parser.parse_args()
+
+    if args.workers is not None:
+        _, count, sizes = label_islands_parallel(load_grid(args.grid_file), args.connectivity,
+                                                 workers=args.workers, return_labels=False)
+        largest = int(sizes.max()) if count else 0
+    elif args.stream or args.width is not None:
+        count = 0
+        largest = 0
+        for area in stream_island_areas(iter_rows(args.grid_file, args.width), args.connectivity):
+            count += 1
+            largest = max(largest, area)
+    else:
+        labels, count, sizes = label_islands(load_grid(args.grid_file), args.connectivity)
+        largest = int(sizes.max()) if count else 0
+    print(f"Islands: {count}")
+    if count:
+        print(f"Largest island: {largest} cells")
@@ -1,6 +1,12 @@
-import sys
+import argparse
 import itertools
+import sys
 from tabulate import tabulate
+from bayesnet import (BayesianNetwork, QueryPlanner, BOOLEAN_STATES, MAX_SAMPLES, SAMPLE_BATCH, TARGET_ERROR,
+                      is_binary_network)
+
+QUERY_BATCH = 4096  # Queries planned together
+STREAM_THRESHOLD = 10000  # Query files longer than this are printed row by row
 
 def read_input(file_path):
     with open(file_path, 'r') as f:
@@ -34,6 +40,69 @@ def read_input(file_path):
     queries = lines[idx:]
     return N, variables, parents, CPTs, queries
 
+# Edge-list format, one statement per line (blank lines and lines starting with # are skipped):
+#   var NAME [STATE ...]   declares a variable and its states (default: false true)
+#   edge PARENT CHILD      adds an arc; a variable's parents are in the order of its edge lines
+#   cpt NAME P ...         the variable's CPT: for every parent assignment (first parent slowest,
+#                          states in declared order) one probability per state of the variable
+#   P(X | E=e, ...)        a query
+# A variable first named by an edge or cpt line is boolean. Reading is linear in the file size.
+EDGE_LIST_KEYWORDS = ("var", "edge", "cpt")
+
+def read_edge_list(file_path):
+    index = {}
+    variables, states, parents, CPTs = [], [], [], []
+    queries = []
+
+    def variable(name):
+        if name not in index:
+            index[name] = len(variables)
+            variables.append(name)
+            states.append(BOOLEAN_STATES)
+            parents.append([])
+            CPTs.append(None)
+        return index[name]
+
+    with open(file_path, 'r') as f:
+        for number, line in enumerate(f, 1):
+            fields = line.split()
+            if not fields or fields[0].startswith('#'):
+                continue
+            if fields[0] == 'var' and len(fields) >= 2:
+                v = variable(fields[1])
+                if len(fields) > 2:
+                    states[v] = tuple(fields[2:])
+            elif fields[0] == 'edge' and len(fields) == 3:
+                parents[variable(fields[2])].append(variable(fields[1]))
+            elif fields[0] == 'cpt' and len(fields) >= 2:
+                CPTs[variable(fields[1])] = list(map(float, fields[2:]))
+            elif line.strip().startswith('P('):
+                queries.append(line.strip())
+            else:
+                raise ValueError(f"{file_path}:{number}: cannot parse {line.strip()!r}")
+    missing = [name for name, cpt in zip(variables, CPTs) if cpt is None]
+    if missing:
+        raise ValueError(f"{file_path}: no CPT for {', '.join(missing)}")
+    return variables, states, parents, CPTs, queries
+
+def is_edge_list(file_path):
+    with open(file_path, 'r') as f:
+        for line in f:
+            fields = line.split()
+            if fields and not fields[0].startswith('#'):
+                return fields[0] in EDGE_LIST_KEYWORDS
+    return False
+
+def load_network(file_path, seed=None):
+    """(network, query lines) from a binary network, an edge list, or read_input's matrix format."""
+    if is_binary_network(file_path):
+        return BayesianNetwork.load(file_path, seed), []
+    if is_edge_list(file_path):
+        variables, states, parents, CPTs, queries = read_edge_list(file_path)
+        return BayesianNetwork(variables, parents, CPTs, seed=seed, states=states), queries
+    N, variables, parents, CPTs, queries = read_input(file_path)
+    return BayesianNetwork(variables, parents, CPTs, seed=seed), queries
+
 def compute_probability(variables, parents, CPTs, query_var, evidence):
     var_indices = {var: idx for idx, var in enumerate(variables)}
     Q_idx = var_indices[query_var]
@@ -83,30 +152,159 @@ def parse_query(query_line):
         for item in rhs.strip().split(','):
             if '=' in item:
                 var, val = item.strip().split('=')
-                evidence[var.strip()] = True if val.strip().lower() == 'true' else False
+                val = val.strip()
+                # true/false (any case) are booleans; anything else names a state of a multi-valued variable
+                evidence[var.strip()] = {'true': True, 'false': False}.get(val.lower(), val)
         return query_var, evidence
     else:
         return None, None
 
-def main():
-    if len(sys.argv) != 2:
-        print("Usage: python bayesian_network.py <input_file>")
-        sys.exit(1)
-    input_file = sys.argv[1]
-    N, variables, parents, CPTs, queries = read_input(input_file)
-    var_indices = {var: idx for idx, var in enumerate(variables)}
-    results = []
+def query_label(query_var, evidence):
+    evidence_str = ', '.join([f'{var}={str(val)}' for var, val in evidence.items()])
+    return f"P({query_var} | {evidence_str})"
+
+def query_labels(network, query_var, evidence):
+    # One row per query for a boolean variable, one per state otherwise
+    states = network.states[network.index[query_var]]
+    if states == BOOLEAN_STATES:
+        return [query_label(query_var, evidence)]
+    return [query_label(f"{query_var}={state}", evidence) for state in states]
+
+def parsed_queries(queries):
     for query_line in queries:
         if not query_line.strip():
             continue
         query_var, evidence = parse_query(query_line)
-        if query_var is None:
-            continue
-        p_true, p_false = compute_probability(variables, parents, CPTs, query_var, evidence)
-        evidence_str = ', '.join([f'{var}={str(val)}' for var, val in evidence.items()])
-        results.append([f"P({query_var} | {evidence_str})", f"{p_true:.3f}", f"{p_false:.3f}"])
-    headers = ["Query", "P(True)", "P(False)"]
-    print(tabulate(results, headers=headers, tablefmt="grid"))
+        if query_var is not None:
+            yield query_var, evidence
+
+def batches(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+# The same layout as tabulate's "grid" format, written row by row with fixed column widths.
+# Numbers are formatted like tabulate does: floats with "g" and their decimal points aligned.
+# decimals gives, per numeric column, the most digits after the point that column can hold
+# (tabulate aligns on the most it actually holds), or None for a column of integers.
+def stream_table(rows, headers, widths, decimals, out=None):
+    out = out or sys.stdout
+    rule = "+" + "+".join("-" * (width + 2) for width in widths) + "+\n"
+
+    def number(cell, digits):
+        if digits is None:
+            return cell
+        text = format(float(cell), "g")
+        point = text.rfind(".")
+        return text + " " * (digits - (len(text) - point - 1 if point >= 0 else -1))
+
+    def line(cells, header=False):
+        numbers = cells[1:] if header else [number(cell, digits) for cell, digits in zip(cells[1:], decimals)]
+        padded = [cells[0].ljust(widths[0])] + [cell.rjust(width) for cell, width in zip(numbers, widths[1:])]
+        return "| " + " | ".join(padded) + " |\n"
+
+    rows = iter(rows)
+    first = next(rows, None)
+    if first is None:
+        # Without rows tabulate has no numeric columns: every header is left-aligned
+        out.write(rule + "| " + " | ".join(h.ljust(w) for h, w in zip(headers, widths)) + " |\n"
+                  + rule.replace("-", "=") + rule)
+        return
+    out.write(rule + line(headers, header=True) + rule.replace("-", "="))
+    for row in itertools.chain([first], rows):
+        out.write(line(row) + rule)
+
+def main():
+    parser = argparse.ArgumentParser(description="Answer P(X | evidence) queries on a Bayesian network")
+    parser.add_argument("input_file", help="network and queries: the matrix format, an edge list "
+                                           "(var/edge/cpt lines) or a binary network written by --save-binary")
+    parser.add_argument("--queries", help="file of further query lines, one P(X | evidence) per line")
+    parser.add_argument("--save-binary", metavar="PATH",
+                        help="also write the network in binary form, which loads memory-mapped")
+    parser.add_argument("--method", choices=["ve", "jt", "enumeration", "lw", "gibbs"], default="ve",
+                        help="variable elimination (default), a junction tree compiled once and "
+                             "calibrated per evidence set, enumeration of the hidden variables, "
+                             "or sampling: likelihood weighting or blocked Gibbs")
+    parser.add_argument("--order", choices=["min-fill", "min-degree"], default="min-fill",
+                        help="elimination order heuristic for variable elimination")
+    parser.add_argument("--no-prune", dest="prune", action="store_false",
+                        help="run on the whole network instead of the part each query needs "
+                             "(barren and d-separated variables dropped, evidence absorbed); "
+                             "the junction tree always covers the whole network")
+    parser.add_argument("--seed", type=int, help="sampling: random seed")
+    parser.add_argument("--target-error", type=float, default=TARGET_ERROR,
+                        help="sampling: stop once every 95%% confidence half-width is below this")
+    parser.add_argument("--time-limit", type=float, help="sampling: seconds per evidence set")
+    parser.add_argument("--max-samples", type=int, default=MAX_SAMPLES,
+                        help="sampling: samples per evidence set")
+    args = parser.parse_args()
+    network, queries = load_network(args.input_file, args.seed)
+    if args.queries:
+        with open(args.queries, 'r') as f:
+            queries += [line.strip() for line in f if line.strip() != '']
+    if args.save_binary:
+        network.save(args.save_binary)
+        if not queries:
+            return
+    if args.method == "enumeration" and not network.boolean:
+        parser.error("enumeration handles boolean networks only")
+    sampling = args.method in ("lw", "gibbs")
+    options = dict(target_error=args.target_error, time_limit=args.time_limit,
+                   max_samples=args.max_samples) if sampling else {}
+
+    # Queries are planned in batches: duplicates answered once, the rest grouped by evidence
+    if args.method == "enumeration":
+        CPTs = network.CPTs
+
+        def solve_group(query_vars, evidence):
+            results = {}
+            for query_var in query_vars:
+                if args.prune:
+                    reduced, reduced_evidence = network.prune(
+                        [query_var], {var: val for var, val in evidence.items() if var != query_var})
+                    p_true, p_false = compute_probability(reduced.variables, reduced.parents, reduced.CPTs,
+                                                          query_var, reduced_evidence)
+                else:
+                    p_true, p_false = compute_probability(network.variables, network.parents, CPTs,
+                                                          query_var, evidence)
+                results[query_var] = (p_false, p_true)
+            return results
+    else:
+        def solve_group(query_vars, evidence):
+            return network.query_group(query_vars, evidence, args.order, args.method, args.prune, **options)
+    planner = QueryPlanner(solve_group)
+
+    def rows():
+        for batch in batches(parsed_queries(queries), QUERY_BATCH):
+            for (query_var, evidence), result in zip(batch, planner.answer(batch)):
+                distribution, half_widths, ess = result if sampling else (result, None, None)
+                labels = query_labels(network, query_var, evidence)
+                # A boolean variable's row is its true state; a multi-valued one gets a row per state
+                states = [1] if len(labels) == 1 else range(len(labels))
+                for label, state in zip(labels, states):
+                    p_false = distribution[0] if len(labels) == 1 else 1 - distribution[state]
+                    row = [label, f"{distribution[state]:.3f}", f"{p_false:.3f}"]
+                    if sampling:
+                        row += [f"{half_widths[state]:.3f}", f"{ess:.0f}"]
+                    yield row
+
+    headers = ["Query", "P(True)", "P(False)"] + (["95% CI +/-", "ESS"] if sampling else [])
+    if len(queries) <= STREAM_THRESHOLD:
+        print(tabulate(list(rows()), headers=headers, tablefmt="grid"))
+    else:
+        # Large query files: one cheap pass for the label width, then rows are printed as answered.
+        # Widths follow tabulate (headers get two spaces of padding); probabilities and half-widths
+        # take at most five characters, the ESS column is sized for the most samples a query can draw.
+        label_width = max((len(label) for query in parsed_queries(queries)
+                           for label in query_labels(network, *query)), default=len(headers[0]))
+        cell_widths = [label_width, 5, 5] + ([5, len(str(args.max_samples + SAMPLE_BATCH))] if sampling else [])
+        stream_table(rows(), headers, [max(len(header) + 2, width) for header, width in zip(headers, cell_widths)],
+                     [3, 3] + ([3, None] if sampling else []))
 
 if __name__ == "__main__":
     main()
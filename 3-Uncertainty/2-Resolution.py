@@ -1,7 +1,7 @@
 import sys
 import re
+import time
 from collections import defaultdict
-from copy import deepcopy
 
 class Literal:
     def __init__(self, name, args=[], is_neg=False):
@@ -12,7 +12,7 @@ class Literal:
     def __repr__(self):
         neg = "¬" if self.is_neg else ""
         if self.args:
-            args_str = ", ".join(self.args)
+            args_str = ", ".join(map(str, self.args))
             return f"{neg}{self.name}({args_str})"
         else:
             return f"{neg}{self.name}"
@@ -37,6 +37,83 @@ class Clause:
     def __repr__(self):
         return "∨".join([str(lit) for lit in self.literals])
 
+class Term:
+    """
+    A parsed first-order term: a variable (a name starting with a lower-case letter, no
+    arguments), a constant, or a function applied to argument terms. Terms are built through
+    make_term, which interns them: equal terms are the same object, so they compare and hash by
+    identity. The set of variables a term contains is computed once, when it is built.
+    """
+    __slots__ = ("name", "args", "is_variable", "variables", "text")
+
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+        self.is_variable = not args and name[0].islower()
+        if self.is_variable:
+            self.variables = frozenset((self,))
+        else:
+            # Shared with the argument when only one contributes variables
+            nonempty = [arg.variables for arg in args if arg.variables]
+            self.variables = nonempty[0] if len(nonempty) == 1 else frozenset().union(*nonempty)
+        self.text = None
+
+    @property
+    def ground(self):
+        return not self.variables
+
+    def __repr__(self):
+        # The string is only needed for output, so it is built on first use
+        if self.text is None:
+            self.text = f"{self.name}({', '.join(map(str, self.args))})" if self.args else self.name
+        return self.text
+
+TERMS = {}  # (name, args) -> the interned Term
+
+def make_term(name, args=()):
+    key = (name, args)
+    term = TERMS.get(key)
+    if term is None:
+        term = TERMS[key] = Term(name, args)
+    return term
+
+TOKEN = re.compile(r'[^\s(),]+|[(),]')
+
+def parse_terms(args_str):
+    """Parses a comma-separated list of terms in one pass over its tokens."""
+    tokens = TOKEN.findall(args_str)
+    position = 0
+
+    def term():
+        nonlocal position
+        name = tokens[position]
+        position += 1
+        if position < len(tokens) and tokens[position] == '(':
+            position += 1
+            args = [term()]
+            while tokens[position] == ',':
+                position += 1
+                args.append(term())
+            if tokens[position] != ')':
+                raise ValueError(f"Invalid term: {args_str}")
+            position += 1
+            return make_term(name, tuple(args))
+        return make_term(name)
+
+    terms = [term()] if tokens else []
+    while position < len(tokens) and tokens[position] == ',':
+        position += 1
+        terms.append(term())
+    if position != len(tokens):
+        raise ValueError(f"Invalid term: {args_str}")
+    return terms
+
+def parse_term(term_str):
+    terms = parse_terms(term_str)
+    if len(terms) != 1:
+        raise ValueError(f"Invalid term: {term_str}")
+    return terms[0]
+
 def parse_literal(literal_str):
     literal_str = literal_str.strip()
     is_neg = False
@@ -50,27 +127,9 @@ def parse_literal(literal_str):
     args_str = match.group(2)
     args = []
     if args_str:
-        args = split_args(args_str)
+        args = parse_terms(args_str)
     return Literal(name, args, is_neg)
 
-def split_args(args_str):
-    args = []
-    current = ""
-    depth = 0
-    for char in args_str:
-        if char == ',' and depth == 0:
-            args.append(current.strip())
-            current = ""
-        else:
-            if char == '(':
-                depth += 1
-            elif char == ')':
-                depth -= 1
-            current += char
-    if current:
-        args.append(current.strip())
-    return args
-
 def parse_clause(clause_str):
     literals_str = clause_str.split("∨")
     literals = [parse_literal(lit) for lit in literals_str]
@@ -84,76 +143,88 @@ class Standardizer:
         substitution = {}
         new_literals = []
         for lit in clause.literals:
-            new_args = []
-            for arg in lit.args:
-                if is_variable(arg):
-                    if arg not in substitution:
-                        substitution[arg] = f"{arg}"
-                        self.counter[arg] += 1
-                    new_args.append(substitution[arg])
-                elif is_function(arg):
-                    new_args.append(self.standardize_term(arg, substitution))
-                else:
-                    new_args.append(arg)
+            new_args = [self.standardize_term(arg, substitution) for arg in lit.args]
             new_literals.append(Literal(lit.name, new_args, lit.is_neg))
         return Clause(new_literals)
 
     def standardize_term(self, term, substitution):
-        if not is_function(term):
-            if is_variable(term):
-                if term not in substitution:
-                    substitution[term] = f"{term}"
-                    self.counter[term] += 1
-                return substitution[term]
-            else:
-                return term
+        if term.is_variable:
+            if term not in substitution:
+                substitution[term] = make_term(f"{term.name}")
+                self.counter[term.name] += 1
+            return substitution[term]
+        elif term.ground:
+            return term
         else:
-            name = get_function_name(term)
-            args = get_arguments(term)
-            new_args = []
-            for arg in args:
-                if is_variable(arg):
-                    if arg not in substitution:
-                        substitution[arg] = f"{arg}"
-                        self.counter[arg] += 1
-                    new_args.append(substitution[arg])
-                elif is_function(arg):
-                    new_args.append(self.standardize_term(arg, substitution))
-                else:
-                    new_args.append(arg)
-            return f"{name}({', '.join(new_args)})"
-
-def is_variable(term):
-    return term[0].islower()
-
-def is_function(term):
-    return '(' in term and term.endswith(')')
-
-def get_function_name(term):
-    return term[:term.find('(')]
-
-def get_arguments(term):
-    args_str = term[term.find('(')+1:-1]
-    return split_args(args_str)
+            return make_term(term.name, tuple(self.standardize_term(arg, substitution) for arg in term.args))
+
+class Bindings:
+    """
+    A substitution as an undoable store of variable bindings. Bindings are triangular: a
+    variable is bound to a term that may contain other bound variables, never to a substituted
+    copy, so binding costs O(1). Every change is pushed on a trail; undo(mark) pops the trail back
+    to a mark() taken earlier, restoring each binding in O(1). walk() compresses chains of
+    variable-to-variable bindings, and those updates go on the trail as well.
+    """
+    def __init__(self):
+        self.values = {}
+        self.trail = []  # (variable, value before the change, None if it was unbound)
+
+    def __contains__(self, var):
+        return var in self.values
+
+    def __getitem__(self, var):
+        return self.values[var]
+
+    def __len__(self):
+        return len(self.values)
+
+    def keys(self):
+        return self.values.keys()
+
+    def bind(self, var, term):
+        self.trail.append((var, self.values.get(var)))
+        self.values[var] = term
+
+    def walk(self, term):
+        """The term at the end of term's chain of bound variables; the chain is re-pointed there."""
+        chain = []
+        while term.is_variable and term in self.values:
+            chain.append(term)
+            term = self.values[term]
+        for var in chain[:-1]:
+            if self.values[var] is not term:
+                self.bind(var, term)
+        return term
+
+    def mark(self):
+        return len(self.trail)
+
+    def undo(self, mark):
+        while len(self.trail) > mark:
+            var, previous = self.trail.pop()
+            if previous is None:
+                del self.values[var]
+            else:
+                self.values[var] = previous
 
 # 统一算法
 def unify(x, y, substitution):
     if substitution is None:
         return None
-    elif x == y:
+    elif x is y:
         return substitution
-    elif is_variable(x):
+    elif x.is_variable:
         return unify_var(x, y, substitution)
-    elif is_variable(y):
+    elif y.is_variable:
         return unify_var(y, x, substitution)
-    elif is_function(x) and is_function(y):
-        if get_function_name(x) != get_function_name(y):
-            return None
-        args_x = get_arguments(x)
-        args_y = get_arguments(y)
-        if len(args_x) != len(args_y):
+    elif x.ground and y.ground:
+        # Interned: distinct ground terms are never equal
+        return None
+    elif x.args and y.args:
+        if x.name != y.name or len(x.args) != len(y.args):
             return None
-        for arg1, arg2 in zip(args_x, args_y):
+        for arg1, arg2 in zip(x.args, y.args):
             substitution = unify(arg1, arg2, substitution)
             if substitution is None:
                 return None
@@ -161,27 +232,31 @@ def unify(x, y, substitution):
     else:
         return None
 
+# substitution is a Bindings store, extended in place; on failure the bindings made so far
+# stay on its trail (unify_literals undoes them)
 def unify_var(var, x, substitution):
     if var in substitution:
-        return unify(substitution[var], x, substitution)
-    elif is_variable(x) and x in substitution:
-        return unify(var, substitution[x], substitution)
+        return unify(substitution.walk(var), x, substitution)
+    elif x.is_variable and x in substitution:
+        return unify(var, substitution.walk(x), substitution)
     elif occurs_check(var, x, substitution):
         return None
     else:
-        substitution = deepcopy(substitution)
-        substitution[var] = x
+        substitution.bind(var, x)
         return substitution
 
-def occurs_check(var, x, substitution):
-    if var == x:
+def occurs_check(var, x, substitution, seen=None):
+    # Only the variables of x matter: var itself, or a bound one whose value contains var.
+    # Each bound variable is followed once, however many terms share it
+    if var is x or var in x.variables:
         return True
-    elif is_function(x):
-        for arg in get_arguments(x):
-            if occurs_check(var, arg, substitution):
+    if seen is None:
+        seen = set()
+    for v in x.variables:
+        if v in substitution and v not in seen:
+            seen.add(v)
+            if occurs_check(var, substitution[v], substitution, seen):
                 return True
-    elif x in substitution:
-        return occurs_check(var, substitution[x], substitution)
     return False
 
 def substitute_literal(literal, substitution):
@@ -191,16 +266,18 @@ def substitute_literal(literal, substitution):
         new_args.append(new_arg)
     return Literal(literal.name, new_args, literal.is_neg)
 
-def substitute_term(term, substitution):
-    while is_variable(term) and term in substitution:
-        term = substitution[term]
-    if is_function(term):
-        name = get_function_name(term)
-        args = get_arguments(term)
-        new_args = [substitute_term(arg, substitution) for arg in args]
-        return f"{name}({', '.join(new_args)})"
-    else:
+def substitute_term(term, substitution, memo=None):
+    term = substitution.walk(term)
+    if substitution.keys().isdisjoint(term.variables):
         return term
+    # Subterms are shared between interned terms, so each is substituted once per call
+    if memo is None:
+        memo = {}
+    result = memo.get(term)
+    if result is None:
+        result = memo[term] = make_term(term.name, tuple(substitute_term(arg, substitution, memo)
+                                                         for arg in term.args))
+    return result
 
 def substitute_clause(clause, substitution):
     new_literals = [substitute_literal(lit, substitution) for lit in clause.literals]
@@ -214,11 +291,11 @@ def resolve_clauses(clause_str1, clause_str2):
     clause1 = standardizer.standardize(clause1)
     clause2 = standardizer.standardize(clause2)
 
+    bindings = Bindings()
     for lit1 in clause1.literals:
         for lit2 in clause2.literals:
             if lit1.name == lit2.name and lit1.is_neg != lit2.is_neg:
-                substitution = {}
-                substitution = unify_literals(lit1, lit2, substitution)
+                substitution = unify_literals(lit1, lit2, bindings)
                 if substitution is not None:
                     new_clause1 = substitute_clause(clause1, substitution)
                     new_clause2 = substitute_clause(clause2, substitution)
@@ -241,18 +318,51 @@ def unify_literals(lit1, lit2, substitution):
         return None
     if len(lit1.args) != len(lit2.args):
         return None
+    # A failed attempt leaves the store as it was, ready for the next pair of literals
+    mark = substitution.mark()
     for arg1, arg2 in zip(lit1.args, lit2.args):
-        substitution = unify(arg1, arg2, substitution)
-        if substitution is None:
+        if unify(arg1, arg2, substitution) is None:
+            substitution.undo(mark)
             return None
     return substitution
 
 def format_clause(clause):
     return " ∨ ".join([str(lit) for lit in sorted(clause.literals, key=lambda x: str(x))])
 
+def benchmark(depths=(125, 250, 500, 1000, 2000), repeats=5):
+    """
+    Unifies G(x0, G(x1, ... G(xn-1, x0))) with G(x1, G(x2, ... G(xn, F(A)))): every variable is
+    bound to the next, then x0 is walked to the end of that chain and bound to F(A). Prints the
+    best time of each step per depth; per binding it should stay flat as the terms deepen.
+    """
+    print(f"{'depth':>6} {'unify ms':>9} {'subst ms':>9} {'undo ms':>8} {'us/binding':>11}")
+    for depth in depths:
+        sys.setrecursionlimit(max(sys.getrecursionlimit(), 3 * depth + 100))
+        x = [make_term(f"x{i}") for i in range(depth + 1)]
+        left, right = x[0], make_term("F", (make_term("A"),))
+        for i in reversed(range(depth)):
+            left, right = make_term("G", (x[i], left)), make_term("G", (x[i + 1], right))
+        best = [float("inf")] * 3
+        for _ in range(repeats):
+            bindings = Bindings()
+            start = time.perf_counter()
+            assert unify(left, right, bindings) is not None
+            unified = time.perf_counter()
+            assert substitute_term(left, bindings) is substitute_term(right, bindings)
+            substituted = time.perf_counter()
+            bindings.undo(0)
+            undone = time.perf_counter()
+            for i, elapsed in enumerate((unified - start, substituted - unified, undone - substituted)):
+                best[i] = min(best[i], elapsed)
+        print(f"{depth:>6} {best[0] * 1000:>9.2f} {best[1] * 1000:>9.2f} {best[2] * 1000:>8.2f} "
+              f"{best[0] * 1e6 / (depth + 1):>11.2f}")
+
 if __name__ == "__main__":
+    if len(sys.argv) == 2 and sys.argv[1] == "--benchmark":
+        benchmark()
+        sys.exit(0)
     if len(sys.argv) != 2:
-        print(f"Usage: python {sys.argv[0]} <input_file>")
+        print(f"Usage: python {sys.argv[0]} <input_file> | --benchmark")
         sys.exit(1)
 
     input_file = sys.argv[1]
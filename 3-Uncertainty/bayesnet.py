@@ -0,0 +1,921 @@
+import heapq
+import json
+import math
+import os
+import struct
+import time
+from collections import OrderedDict
+import numpy as np
+
+CALIBRATION_CACHE_SIZE = 64  # Calibrated junction trees kept, one per evidence set
+RESULT_CACHE_SIZE = 100000  # Query results kept by QueryPlanner
+SAMPLE_BATCH = 4096  # Likelihood weighting: samples drawn per batch
+GIBBS_CHAINS = 512  # Gibbs: chains run side by side
+GIBBS_BLOCK_CELLS = 1 << 19  # Gibbs: CPT lookups x chains evaluated per vectorised block update
+BURN_IN = 50  # Gibbs: sweeps discarded before counting
+MAX_SAMPLES = 1000000  # Sampling stops after this many samples
+TARGET_ERROR = 0.01  # Sampling stops once every confidence interval is this narrow (half-width)
+MIN_ESS = 100  # ... and the effective sample size is at least this
+CONFIDENCE_Z = 1.96  # 95% confidence intervals (Wilson score)
+PRUNE_CACHE_SIZE = 1024  # Pruned network structures kept, one per (query set, observed set)
+BOOLEAN_STATES = ("false", "true")  # State names of the variables read_input gives
+BINARY_MAGIC = b"BAYESNET"  # First bytes of a network written by BayesianNetwork.save
+BINARY_VERSION = 1
+BINARY_ALIGNMENT = 64  # Arrays in the binary format start at multiples of this many bytes
+
+class Factor:
+    """
+    A table over discrete variables: variables is a tuple of variable indices and values an
+    array with one axis per variable (state 0 = false, 1 = true for boolean variables).
+    """
+    __slots__ = ("variables", "values")
+
+    def __init__(self, variables, values):
+        self.variables = tuple(variables)
+        self.values = np.asarray(values, dtype=float)
+
+    def __repr__(self):
+        return f"Factor({self.variables}, shape={self.values.shape})"
+
+    def _aligned(self, variables):
+        # This factor's values with axes permuted into the order of `variables` and size-1 axes
+        # for the variables it does not mention, ready to broadcast
+        order = sorted(range(len(self.variables)), key=lambda axis: variables.index(self.variables[axis]))
+        shape = [1] * len(variables)
+        for axis in order:
+            shape[variables.index(self.variables[axis])] = self.values.shape[axis]
+        return self.values.transpose(order).reshape(shape)
+
+    def multiply(self, other):
+        variables = self.variables + tuple(v for v in other.variables if v not in self.variables)
+        return Factor(variables, self._aligned(variables) * other._aligned(variables))
+
+    def sum_out(self, variable):
+        axis = self.variables.index(variable)
+        return Factor(self.variables[:axis] + self.variables[axis + 1:], self.values.sum(axis=axis))
+
+    def reduce(self, evidence):
+        """Fixes the observed variables (evidence maps variable -> state) and drops their axes."""
+        if not any(v in evidence for v in self.variables):
+            return self
+        index = tuple(evidence[v] if v in evidence else slice(None) for v in self.variables)
+        return Factor([v for v in self.variables if v not in evidence], self.values[index])
+
+    def normalize(self):
+        return Factor(self.variables, self.values / self.values.sum())
+
+    def project(self, variables):
+        """Sums out every variable not in `variables` and orders the axes like `variables`."""
+        variables = tuple(variables)
+        drop = tuple(axis for axis, v in enumerate(self.variables) if v not in variables)
+        kept = [v for v in self.variables if v in variables]
+        values = self.values.sum(axis=drop) if drop else self.values
+        return Factor(variables, values.transpose([kept.index(v) for v in variables]))
+
+def multiply_all(factors):
+    result = factors[0]
+    for factor in factors[1:]:
+        result = result.multiply(factor)
+    return result
+
+def interaction_graph(factors):
+    neighbours = {}
+    for factor in factors:
+        for v in factor.variables:
+            neighbours.setdefault(v, set()).update(u for u in factor.variables if u != v)
+    return neighbours
+
+def elimination_order(factors, variables, heuristic="min-fill"):
+    """
+    Greedy elimination order for `variables` on the factors' interaction graph: each step takes
+    the variable that adds the fewest fill-in edges ("min-fill") or has the fewest neighbours
+    ("min-degree"), then connects its neighbours. Costs sit in a heap and are only recomputed
+    around the eliminated variable.
+    """
+    if heuristic not in ("min-fill", "min-degree"):
+        raise ValueError(f"Unknown elimination heuristic: {heuristic}")
+    graph = interaction_graph(factors)
+    remaining = set(variables)
+    for v in remaining:
+        graph.setdefault(v, set())
+
+    def cost(v):
+        neighbours = graph[v]
+        if heuristic == "min-degree":
+            return (len(neighbours), v)
+        fill = 0
+        for u in neighbours:
+            fill += len(neighbours - graph[u]) - 1
+        return (fill // 2, len(neighbours), v)
+
+    current = {v: cost(v) for v in remaining}
+    heap = list(current.values())
+    heapq.heapify(heap)
+    order = []
+    while heap:
+        key = heapq.heappop(heap)
+        v = key[-1]
+        if v not in remaining or current[v] != key:
+            continue
+        neighbours = graph.pop(v)
+        for u in neighbours:
+            graph[u].discard(v)
+            graph[u].update(neighbours - {u})
+        remaining.discard(v)
+        order.append(v)
+        # Degrees change for the neighbours; fill-in counts also for the neighbours' neighbours
+        affected = set(neighbours)
+        if heuristic == "min-fill":
+            for u in neighbours:
+                affected.update(graph[u])
+        for u in affected & remaining:
+            current[u] = cost(u)
+            heapq.heappush(heap, current[u])
+    return order
+
+def variable_elimination(factors, query, evidence, heuristic="min-fill", memo=None, order=None):
+    """
+    P(query | evidence) as a normalized array over the query variable's states. evidence maps
+    variable -> observed state.
+
+    Queries with the same evidence can share a memo dict and an elimination order (each query
+    skips its own variable): eliminating a variable from the same input factors gives the same
+    intermediate factor, which is then computed only once.
+    """
+    if memo is None:
+        memo = {}
+    factors = dict(enumerate(factor.reduce(evidence) for factor in factors) if evidence else enumerate(factors))
+    # variable -> ids of the factors that mention it
+    buckets = {}
+    for i, factor in factors.items():
+        for v in factor.variables:
+            buckets.setdefault(v, set()).add(i)
+    hidden = set(buckets) - {query}
+    num_factors = len(factors)
+    if order is None:
+        order = elimination_order(list(factors.values()), hidden, heuristic)
+    for v in order:
+        if v not in hidden:
+            continue
+        ids = tuple(sorted(buckets.pop(v)))
+        involved = [factors.pop(i) for i in ids]
+        for i, factor in zip(ids, involved):
+            for u in factor.variables:
+                if u != v:
+                    buckets[u].discard(i)
+        key = (v, ids)
+        if key not in memo:
+            memo[key] = (num_factors + len(memo), multiply_all(involved).sum_out(v))
+        product_id, product = memo[key]
+        factors[product_id] = product
+        for u in product.variables:
+            buckets[u].add(product_id)
+    result = multiply_all([factor for factor in factors.values() if factor.variables]).normalize()
+    return result.values
+
+class JunctionTree:
+    """
+    Clique tree compiled once from the CPT factors. Eliminating the variables in a min-fill
+    (or min-degree) order creates one clique per variable, {v} plus its neighbours at that
+    point; the clique's parent is the clique of the next variable of its separator to be
+    eliminated. Every CPT goes to the clique of its first eliminated variable.
+
+    calibrate() runs two-pass (Hugin) message passing with the evidence entered, giving every
+    clique its marginal; calibrations are kept in a bounded LRU keyed by the evidence.
+    """
+    def __init__(self, factors, heuristic="min-fill", cache_size=CALIBRATION_CACHE_SIZE):
+        variables = {v for factor in factors for v in factor.variables}
+        cardinality = {}
+        for factor in factors:
+            cardinality.update(zip(factor.variables, factor.values.shape))
+        order = elimination_order(factors, variables, heuristic)
+        position = {v: i for i, v in enumerate(order)}
+        graph = interaction_graph(factors)
+        for v in variables:
+            graph.setdefault(v, set())
+
+        self.cliques = []
+        self.separators = []
+        self.parent = []
+        for v in order:
+            neighbours = graph.pop(v)
+            for u in neighbours:
+                graph[u].discard(v)
+                graph[u].update(neighbours - {u})
+            separator = tuple(sorted(neighbours, key=position.get))
+            self.cliques.append((v,) + separator)
+            self.separators.append(separator)
+            # Cliques are numbered by elimination order, so a parent always comes after its children
+            self.parent.append(position[separator[0]] if separator else None)
+        self.children = [[] for _ in self.cliques]
+        for i, j in enumerate(self.parent):
+            if j is not None:
+                self.children[j].append(i)
+
+        self.potentials = [Factor(clique, np.ones([cardinality[v] for v in clique])) for clique in self.cliques]
+        for factor in factors:
+            if factor.variables:
+                home = min(position[v] for v in factor.variables)
+                self.potentials[home] = self.potentials[home].multiply(factor)
+        # Smallest clique holding each variable, to read its marginal from
+        self.home = {}
+        for i, clique in enumerate(self.cliques):
+            for v in clique:
+                if v not in self.home or len(clique) < len(self.cliques[self.home[v]]):
+                    self.home[v] = i
+
+        self.cache_size = cache_size
+        self.calibrations = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def calibrate(self, evidence):
+        """Clique marginals P(clique | evidence), one normalized Factor per clique."""
+        key = frozenset(evidence.items())
+        beliefs = self.calibrations.get(key)
+        if beliefs is not None:
+            self.calibrations.move_to_end(key)
+            self.hits += 1
+            return beliefs
+        self.misses += 1
+
+        potentials = list(self.potentials)
+        for v, state in evidence.items():
+            i = self.home[v]
+            indicator = np.zeros(potentials[i].values.shape[potentials[i].variables.index(v)])
+            indicator[state] = 1.0
+            potentials[i] = potentials[i].multiply(Factor((v,), indicator))
+
+        # Collect: children come before their parents in clique order
+        upward = [None] * len(potentials)
+        messages = [None] * len(potentials)
+        for i, potential in enumerate(potentials):
+            for child in self.children[i]:
+                potential = potential.multiply(messages[child])
+            upward[i] = potential
+            if self.parent[i] is not None:
+                # Scaled to sum to one so long chains of evidence do not underflow
+                messages[i] = potential.project(self.separators[i]).normalize()
+
+        # Distribute: the parent's belief divided by what the child sent up
+        beliefs = [None] * len(potentials)
+        for i in reversed(range(len(potentials))):
+            belief = upward[i]
+            if self.parent[i] is not None:
+                incoming = beliefs[self.parent[i]].project(self.separators[i]).values
+                sent = messages[i].values
+                down = np.divide(incoming, sent, out=np.zeros_like(incoming), where=sent != 0)
+                belief = belief.multiply(Factor(self.separators[i], down))
+            beliefs[i] = belief.normalize()
+
+        self.calibrations[key] = beliefs
+        if len(self.calibrations) > self.cache_size:
+            self.calibrations.popitem(last=False)
+        return beliefs
+
+    def marginal(self, variable, evidence):
+        return self.calibrate(evidence)[self.home[variable]].project((variable,)).values
+
+    def marginals(self, evidence):
+        beliefs = self.calibrate(evidence)
+        return {v: beliefs[i].project((v,)).values for v, i in self.home.items()}
+
+def topological_order(parents):
+    children = [[] for _ in parents]
+    missing = [len(p) for p in parents]
+    for v, ps in enumerate(parents):
+        for p in ps:
+            children[p].append(v)
+    order = [v for v in range(len(parents)) if missing[v] == 0]
+    for v in order:
+        for c in children[v]:
+            missing[c] -= 1
+            if missing[c] == 0:
+                order.append(c)
+    return order
+
+def cpt_rows(samples, parents, cardinalities):
+    # CPT row of every sample: the parents' states read as a mixed-radix number, first parent high
+    index = np.zeros(samples.shape[1], dtype=np.intp)
+    for p in parents:
+        index = index * cardinalities[p] + samples[p]
+    return index
+
+def sample_states(rng, weights):
+    """One state per column of `weights` (states x samples, columns need not be normalized)."""
+    if len(weights) == 2:
+        total = weights[0] + weights[1]
+        p = np.divide(weights[1], total, out=np.full(total.shape, 0.5), where=total > 0)
+        return rng.random(len(p)) < p
+    cumulative = np.cumsum(weights, axis=0)
+    u = rng.random(cumulative.shape[1]) * cumulative[-1]
+    return np.minimum((u >= cumulative).sum(axis=0), len(weights) - 1)
+
+def state_dtype(cardinalities):
+    return np.uint8 if max(cardinalities, default=2) <= 256 else np.intp
+
+def wilson_half_width(p, n):
+    """
+    Half-width of the Wilson score interval for a proportion p from n effective samples, taken
+    as the larger distance from p to either bound. Unlike the normal (Wald) interval it does not
+    shrink to zero when p is 0 or 1, so such an estimate is not mistaken for an exact one.
+    """
+    z2 = CONFIDENCE_Z ** 2
+    centre = (p + z2 / (2 * n)) / (1 + z2 / n)
+    spread = CONFIDENCE_Z * np.sqrt(p * (1 - p) / n + z2 / (4 * n * n)) / (1 + z2 / n)
+    return np.maximum(centre + spread - p, p - (centre - spread))
+
+class SamplingResult:
+    """
+    Estimates of P(query | evidence), one array over the states of each query variable, with
+    95% confidence half-widths per state and an effective sample size per query.
+    """
+    def __init__(self, queries, estimates, half_widths, ess, samples, elapsed, converged):
+        self.queries = queries
+        self.estimates = estimates
+        self.half_widths = half_widths
+        self.ess = ess
+        self.samples = samples
+        self.elapsed = elapsed
+        self.converged = converged
+
+    def __repr__(self):
+        return (f"{self.samples} samples in {self.elapsed:.3f}s, ESS {np.min(self.ess):.0f}, "
+                f"max half-width {max(np.max(h) for h in self.half_widths):.4f}"
+                + ("" if self.converged else " (budget exhausted)"))
+
+def likelihood_weighting(parents, cardinalities, tables, queries, evidence, rng, batch_size=SAMPLE_BATCH,
+                         max_samples=MAX_SAMPLES, target_error=TARGET_ERROR, time_limit=None):
+    """
+    Samples whole batches of the network at once (an array of states, one row per variable) in
+    topological order, fixing the evidence and weighting each sample by its likelihood.
+    tables[v] is v's CPT with one row per parent assignment (see cpt_rows).
+    Weights are kept as logs and rescaled so long evidence chains do not underflow.
+    """
+    start = time.perf_counter()
+    order = topological_order(parents)
+    dtype = state_dtype(cardinalities)
+    reference = -np.inf  # log of the scale the sums below are kept in
+    weight_sum = weight_square_sum = 0.0
+    query_sums = [np.zeros(cardinalities[q]) for q in queries]
+    samples_drawn = 0
+    estimates = half_widths = [np.full(cardinalities[q], np.nan) for q in queries]
+    ess = 0.0
+    converged = False
+    while samples_drawn < max_samples:
+        samples = np.empty((len(parents), batch_size), dtype=dtype)
+        log_weights = np.zeros(batch_size)
+        with np.errstate(divide="ignore"):
+            for v in order:
+                rows = tables[v][cpt_rows(samples, parents[v], cardinalities)]
+                if v in evidence:
+                    samples[v] = evidence[v]
+                    log_weights += np.log(rows[:, evidence[v]])
+                else:
+                    samples[v] = sample_states(rng, rows.T)
+        samples_drawn += batch_size
+        batch_max = log_weights.max()
+        if batch_max > reference:
+            scale = np.exp(reference - batch_max)
+            weight_sum *= scale
+            weight_square_sum *= scale * scale
+            for sums in query_sums:
+                sums *= scale
+            reference = batch_max
+        if reference > -np.inf:
+            weights = np.exp(log_weights - reference)
+            weight_sum += weights.sum()
+            weight_square_sum += (weights * weights).sum()
+            for q, sums in zip(queries, query_sums):
+                sums += np.bincount(samples[q], weights=weights, minlength=len(sums))
+            estimates = [sums / weight_sum for sums in query_sums]
+            ess = weight_sum * weight_sum / weight_square_sum
+            half_widths = [wilson_half_width(p, ess) for p in estimates]
+            if ess >= MIN_ESS and max(h.max() for h in half_widths) <= target_error:
+                converged = True
+                break
+        if time_limit is not None and time.perf_counter() - start > time_limit:
+            break
+    return SamplingResult(list(queries), estimates, half_widths, np.full(len(queries), ess),
+                          samples_drawn, time.perf_counter() - start, converged)
+
+def markov_blanket_blocks(parents, variables):
+    """
+    Greedy colouring of `variables` so that no block holds two variables from each other's
+    Markov blanket; a whole block can then be resampled at once.
+    """
+    blanket = [set(p) for p in parents]
+    for v, ps in enumerate(parents):
+        for p in ps:
+            blanket[p].add(v)
+            blanket[p].update(q for q in ps if q != p)
+    colour = {}
+    blocks = []
+    for v in sorted(variables, key=lambda u: -len(blanket[u])):
+        used = {colour[u] for u in blanket[v] if u in colour}
+        c = next(c for c in range(len(blocks) + 1) if c not in used)
+        if c == len(blocks):
+            blocks.append([])
+        blocks[c].append(v)
+        colour[v] = c
+    return blocks
+
+def split_block(block, parents, children, chains):
+    # Chunks of a block small enough that one update touches at most GIBBS_BLOCK_CELLS lookups
+    limit = max(1, GIBBS_BLOCK_CELLS // chains)
+    chunk, cells = [], 0
+    for v in block:
+        cost = sum(len(parents[c]) + 1 for c in [v] + [c for c, _ in children[v]])
+        if chunk and cells + cost > limit:
+            yield chunk
+            chunk, cells = [], 0
+        chunk.append(v)
+        cells += cost
+    if chunk:
+        yield chunk
+
+def plan_block_update(members, parents, multipliers, cardinalities, children, offsets, pad, index_dtype=np.intp):
+    """
+    The CPT lookups that give P(v | Markov blanket) for every member of a block, as arrays:
+    one lookup of v's own CPT and one per child, padded to the same number of parents with
+    variable `pad` (a row of zeros). The member's own axis gets multiplier 0; its state s is
+    added as s * step, and a child's lookup also adds the child's state (`observed`).
+    """
+    lookups = []
+    starts = []
+    for v in members:
+        starts.append(len(lookups))
+        lookups.append((v, parents[v], multipliers[v], 1, pad))
+        for c, stride in children[v]:
+            lookup_multipliers = [0 if p == v else m for p, m in zip(parents[c], multipliers[c])]
+            lookups.append((c, parents[c], lookup_multipliers, stride * cardinalities[c], c))
+    width = max(1, max(len(lookup[1]) for lookup in lookups))
+    lookup_vars = np.full((len(lookups), width), pad, dtype=np.intp)
+    lookup_multipliers = np.zeros((len(lookups), width), dtype=index_dtype)
+    for i, (_, ps, ms, _, _) in enumerate(lookups):
+        lookup_vars[i, :len(ps)] = ps
+        lookup_multipliers[i, :len(ms)] = ms
+    factor = np.array([lookup[0] for lookup in lookups], dtype=np.intp)
+    base = np.asarray(offsets, dtype=index_dtype)[factor]
+    cpt_size = np.array([cardinalities[f] for f in factor], dtype=index_dtype)
+    step = np.array([lookup[3] for lookup in lookups], dtype=index_dtype)
+    observed = np.array([lookup[4] for lookup in lookups], dtype=np.intp)
+    member_cards = np.array([cardinalities[v] for v in members])
+    valid = np.arange(member_cards.max())[:, None] < member_cards[None, :]
+    return (np.array(members, dtype=np.intp), lookup_vars, lookup_multipliers, base, cpt_size, step,
+            observed, np.array(starts, dtype=np.intp), valid)
+
+def gibbs_sampling(parents, cardinalities, tables, queries, evidence, rng, chains=GIBBS_CHAINS, burn_in=BURN_IN,
+                   max_samples=MAX_SAMPLES, target_error=TARGET_ERROR, time_limit=None):
+    """
+    Blocked Gibbs sampling with many chains side by side (one column per chain). Each sweep
+    resamples every block of variables with no Markov blanket in common in one vectorised
+    step, each from P(v | Markov blanket) (see plan_block_update).
+    The confidence interval comes from the spread of the per-chain averages, so it accounts
+    for autocorrelation; CPTs with zeros can still keep a chain from mixing.
+    """
+    start = time.perf_counter()
+    num_vars = len(parents)
+    # Multiplier of each parent in a variable's CPT row, and the children of each variable
+    multipliers = []
+    children = [[] for _ in range(num_vars)]
+    for v, ps in enumerate(parents):
+        stride, strides = 1, []
+        for p in reversed(ps):
+            children[p].append((v, stride))
+            strides.append(stride)
+            stride *= cardinalities[p]
+        multipliers.append(strides[::-1])
+    # All CPTs in one flat array, so a block's lookups are a single gather per state
+    flat = np.concatenate([table.ravel() for table in tables])
+    offsets = np.cumsum([0] + [table.size for table in tables])
+    index_dtype = np.int32 if len(flat) < 2 ** 31 else np.intp
+    free = [v for v in range(num_vars) if v not in evidence]
+    blocks = [plan_block_update(chunk, parents, multipliers, cardinalities, children, offsets, num_vars, index_dtype)
+              for block in markov_blanket_blocks(parents, free)
+              for chunk in split_block(block, parents, children, chains)]
+
+    # Start every chain from a forward sample with the evidence fixed; the extra last row stays 0
+    # and pads the block updates' lookups
+    state = np.zeros((num_vars + 1, chains), dtype=state_dtype(cardinalities))
+    for v in topological_order(parents):
+        if v in evidence:
+            state[v] = evidence[v]
+        else:
+            state[v] = sample_states(rng, tables[v][cpt_rows(state, parents[v], cardinalities)].T)
+
+    def resample(block):
+        # P(v | Markov blanket) for every member v at once: the members share no Markov blanket,
+        # so their conditionals all read the current state and can be drawn together
+        members, lookup_vars, lookup_multipliers, base, cpt_size, step, observed, starts, valid = block
+        rows = np.zeros((len(base), chains), dtype=index_dtype)
+        for j in range(lookup_vars.shape[1]):
+            rows += state[lookup_vars[:, j]] * lookup_multipliers[:, j, None]
+        index = base[:, None] + rows * cpt_size[:, None] + state[observed]
+        weights = np.empty((len(valid), len(members), chains))
+        for s in range(len(valid)):
+            values = flat[np.minimum(index + s * step[:, None], len(flat) - 1)]
+            weights[s] = np.multiply.reduceat(values, starts, axis=0)
+        weights[~valid] = 0
+        state[members] = sample_states(rng, weights.reshape(len(valid), -1)).reshape(len(members), chains)
+
+    sums = [np.zeros((cardinalities[q], chains)) for q in queries]
+    sweeps = 0
+
+    def summary():
+        # Estimates, confidence half-widths and effective sample sizes from the per-chain averages
+        estimates, half_widths, ess = [], [], []
+        for counts in sums:
+            chain_means = counts / sweeps
+            p = chain_means.mean(axis=1)
+            standard_errors = chain_means.std(axis=1, ddof=1) / np.sqrt(chains)
+            # Identical chain averages: no spread to estimate from, count every sample
+            state_ess = np.divide(p * (1 - p), standard_errors ** 2,
+                                  out=np.full(len(p), float(sweeps * chains)), where=standard_errors ** 2 > 0)
+            estimates.append(p)
+            state_ess = np.minimum(state_ess, sweeps * chains)
+            half_widths.append(wilson_half_width(p, state_ess))
+            ess.append(state_ess.min())
+        return estimates, half_widths, np.array(ess)
+
+    estimates = half_widths = [np.full(cardinalities[q], np.nan) for q in queries]
+    ess = np.zeros(len(queries))
+    converged = False
+    for sweep in range(burn_in + max_samples // chains):
+        for block in blocks:
+            resample(block)
+        # Out of time: cut the burn-in short so at least one sweep is counted
+        timed_out = time_limit is not None and time.perf_counter() - start > time_limit
+        if sweep < burn_in and not timed_out:
+            continue
+        for q, counts in zip(queries, sums):
+            counts += state[q] == np.arange(len(counts))[:, None]
+        sweeps += 1
+        if sweeps % 10 == 0:
+            estimates, half_widths, ess = summary()
+            if ess.min() >= MIN_ESS and max(h.max() for h in half_widths) <= target_error:
+                converged = True
+                break
+        if timed_out:
+            break
+    if sweeps and not converged:
+        estimates, half_widths, ess = summary()
+    return SamplingResult(list(queries), estimates, half_widths, ess, sweeps * chains,
+                          time.perf_counter() - start, converged)
+
+def bayes_ball(parents, children, queries, observed):
+    """
+    Shachter's Bayes-Ball from the query variables. Returns the variables marked on top, whose
+    CPTs are needed to answer the query (everything else is barren or d-separated from it
+    given the observations), and the observed variables the ball reached.
+    """
+    top, bottom, visited = set(), set(), set()
+    schedule = [(q, True) for q in queries]  # (variable, visited from a child)
+    while schedule:
+        v, from_child = schedule.pop()
+        visited.add(v)
+        if from_child and v not in observed:
+            if v not in top:
+                top.add(v)
+                schedule.extend((p, True) for p in parents[v])
+            if v not in bottom:
+                bottom.add(v)
+                schedule.extend((c, False) for c in children[v])
+        elif not from_child:
+            if v in observed:
+                if v not in top:
+                    top.add(v)
+                    schedule.extend((p, True) for p in parents[v])
+            elif v not in bottom:
+                bottom.add(v)
+                schedule.extend((c, False) for c in children[v])
+    return top, visited & set(observed)
+
+def is_binary_network(file_path):
+    with open(file_path, "rb") as f:
+        return f.read(len(BINARY_MAGIC)) == BINARY_MAGIC
+
+def aligned(offset):
+    return -(-offset // BINARY_ALIGNMENT) * BINARY_ALIGNMENT
+
+class BayesianNetwork:
+    """
+    A discrete Bayesian network in compact form. Parent lists are stored CSR-style (v's parents
+    are parent_index[parent_offsets[v]:parent_offsets[v + 1]]) and all CPTs share one contiguous
+    float array: v's table is cpt_values[cpt_offsets[v]:cpt_offsets[v + 1]] in C order, one axis
+    per parent and a last axis over v's states. The row for a parent assignment is thus
+    sum(state_p * stride_p), stride_p being the product of the later parents' cardinalities.
+    CPT factors are views into that array, so a memory-mapped network is never copied.
+
+    The constructor takes the network read by read_input (boolean variables, CPTs holding
+    P(true) per row). With states (a tuple of state names per variable) the variables may be
+    multi-valued and every CPT is its full table, flat or shaped as above.
+    """
+    def __init__(self, variables, parents, CPTs, seed=None, states=None):
+        if states is None:
+            states = [BOOLEAN_STATES] * len(variables)
+            CPTs = [np.stack((1 - p_true, p_true), axis=-1) for p_true in (np.asarray(cpt, dtype=float) for cpt in CPTs)]
+        parent_offsets = np.zeros(len(variables) + 1, dtype=np.int64)
+        np.cumsum([len(ps) for ps in parents], out=parent_offsets[1:])
+        parent_index = np.fromiter((p for ps in parents for p in ps), dtype=np.int32, count=int(parent_offsets[-1]))
+        tables = [np.asarray(cpt, dtype=float).ravel() for cpt in CPTs]
+        cpt_offsets = np.zeros(len(variables) + 1, dtype=np.int64)
+        np.cumsum([table.size for table in tables], out=cpt_offsets[1:])
+        cpt_values = np.concatenate(tables) if tables else np.zeros(0)
+        self._setup(variables, states, parent_offsets, parent_index, cpt_offsets, cpt_values, seed)
+
+    @classmethod
+    def from_arrays(cls, variables, states, parent_offsets, parent_index, cpt_offsets, cpt_values, seed=None):
+        """A network over existing arrays (laid out as described above), without copying them."""
+        network = cls.__new__(cls)
+        network._setup(variables, states, parent_offsets, parent_index, cpt_offsets, cpt_values, seed)
+        return network
+
+    def _setup(self, variables, states, parent_offsets, parent_index, cpt_offsets, cpt_values, seed):
+        self.variables = list(variables)
+        self.states = [tuple(s) for s in states]
+        self.cardinalities = [len(s) for s in self.states]
+        self.parent_offsets = parent_offsets
+        self.parent_index = parent_index
+        self.cpt_offsets = cpt_offsets
+        self.cpt_values = cpt_values
+        offsets, index = parent_offsets.tolist(), parent_index.tolist()
+        self.parents = [index[a:b] for a, b in zip(offsets, offsets[1:])]
+        self.index = {name: i for i, name in enumerate(self.variables)}
+        self._cpt_offsets = cpt_offsets.tolist()
+        if self._cpt_offsets[-1] != len(cpt_values) or offsets[-1] != len(parent_index):
+            raise ValueError("CPT or parent offsets do not match the arrays they index")
+        self._factors = None
+        self.children = [[] for _ in self.variables]
+        for v, ps in enumerate(self.parents):
+            for p in ps:
+                self.children[p].append(v)
+        self._junction_tree = None
+        self._pruned = OrderedDict()
+        self.rng = np.random.default_rng(seed)
+
+    @property
+    def boolean(self):
+        return all(s == BOOLEAN_STATES for s in self.states)
+
+    @property
+    def CPTs(self):
+        """The CPTs as read_input gives them, P(true) per row (boolean networks only)."""
+        if not self.boolean:
+            raise ValueError("P(true) CPTs exist for boolean networks only")
+        offsets = self._cpt_offsets
+        return [self.cpt_values[a + 1:b:2].tolist() for a, b in zip(offsets, offsets[1:])]
+
+    def cpt_table(self, v):
+        """v's CPT as a view of cpt_values, one axis per parent and the last over v's states."""
+        shape = [self.cardinalities[p] for p in self.parents[v]] + [self.cardinalities[v]]
+        start, end = self._cpt_offsets[v], self._cpt_offsets[v + 1]
+        if end - start != math.prod(shape):
+            raise ValueError(f"CPT of {self.variables[v]} has {end - start} entries, expected {math.prod(shape)}")
+        return self.cpt_values[start:end].reshape(shape)
+
+    @property
+    def factors(self):
+        # Built on first use: answering pruned queries only reads the requisite CPTs
+        if self._factors is None:
+            self._factors = [Factor(ps + [v], self.cpt_table(v)) for v, ps in enumerate(self.parents)]
+        return self._factors
+
+    def evidence_states(self, evidence):
+        """
+        Maps observed variable names to state indices. Values are state names, or True/False
+        for "true"/"false" (the states of a boolean variable are indices 0 and 1 either way).
+        """
+        states = {}
+        for var, val in evidence.items():
+            v = self.index[var]
+            name = ("true" if val else "false") if isinstance(val, (bool, np.bool_)) else val
+            if name not in self.states[v]:
+                raise ValueError(f"{var} has no state {val!r}; its states are {', '.join(self.states[v])}")
+            states[v] = self.states[v].index(name)
+        return states
+
+    def save(self, file_path):
+        """
+        Writes the network in binary form: a magic string, the length of a JSON header (names,
+        state names, array layout), the header, then the arrays, each aligned to
+        BINARY_ALIGNMENT bytes so load() can map them straight from the file.
+        """
+        state_sets = list(dict.fromkeys(self.states))
+        set_index = {s: i for i, s in enumerate(state_sets)}
+        arrays = {
+            "state_set": np.array([set_index[s] for s in self.states], dtype="<i4"),
+            "parent_offsets": np.asarray(self.parent_offsets, dtype="<i8"),
+            "parent_index": np.asarray(self.parent_index, dtype="<i4"),
+            "cpt_offsets": np.asarray(self.cpt_offsets, dtype="<i8"),
+            "cpt_values": np.asarray(self.cpt_values, dtype="<f8"),
+        }
+        layout = {}
+        offset = 0
+        for name, array in arrays.items():
+            layout[name] = [array.dtype.str, offset, array.size]
+            offset = aligned(offset + array.nbytes)
+        header = json.dumps({"version": BINARY_VERSION, "variables": self.variables,
+                             "state_sets": state_sets, "arrays": layout}).encode()
+        data_start = aligned(len(BINARY_MAGIC) + 8 + len(header))
+        # Written to a temporary file first so an interrupted save never leaves a truncated network
+        temporary = file_path + ".tmp"
+        with open(temporary, "wb") as f:
+            f.write(BINARY_MAGIC + struct.pack("<Q", len(header)) + header)
+            for name, array in arrays.items():
+                f.seek(data_start + layout[name][1])
+                f.write(array.tobytes())
+            f.truncate(data_start + offset)
+        os.replace(temporary, file_path)
+
+    @classmethod
+    def load(cls, file_path, seed=None, mmap=True):
+        """
+        Reads a network written by save(). With mmap the arrays are views of the memory-mapped
+        file, so loading costs little more than parsing the header and pages are read on use.
+        """
+        with open(file_path, "rb") as f:
+            if f.read(len(BINARY_MAGIC)) != BINARY_MAGIC:
+                raise ValueError(f"{file_path} is not a binary Bayesian network")
+            (header_size,) = struct.unpack("<Q", f.read(8))
+            header = json.loads(f.read(header_size))
+        if header["version"] != BINARY_VERSION:
+            raise ValueError(f"{file_path}: unsupported format version {header['version']}")
+        data = np.memmap(file_path, dtype=np.uint8, mode="r") if mmap else np.fromfile(file_path, dtype=np.uint8)
+        data_start = aligned(len(BINARY_MAGIC) + 8 + header_size)
+        arrays = {name: np.frombuffer(data, dtype=dtype, count=count, offset=data_start + offset)
+                  for name, (dtype, offset, count) in header["arrays"].items()}
+        state_sets = [tuple(s) for s in header["state_sets"]]
+        states = [state_sets[i] for i in arrays["state_set"].tolist()]
+        return cls.from_arrays(header["variables"], states, arrays["parent_offsets"], arrays["parent_index"],
+                               arrays["cpt_offsets"], arrays["cpt_values"], seed)
+
+    def junction_tree(self, heuristic="min-fill"):
+        if self._junction_tree is None:
+            self._junction_tree = JunctionTree(self.factors, heuristic)
+        return self._junction_tree
+
+    def prune(self, query_vars, evidence):
+        """
+        The part of the network the query needs, as a new BayesianNetwork and its evidence.
+        Only the CPTs Bayes-Ball marks as requisite are kept; an observed parent outside that
+        set is absorbed into its children's CPTs (only the rows for its observed value remain).
+        The structure is cached per (query variables, observed variables).
+        """
+        states = self.evidence_states(evidence)
+        key = (frozenset(self.index[query_var] for query_var in query_vars), frozenset(states))
+        structure = self._pruned.get(key)
+        if structure is None:
+            top, _ = bayes_ball(self.parents, self.children, key[0], states)
+            kept = sorted(top)
+            position = {v: i for i, v in enumerate(kept)}
+            parents = [[position[p] for p in self.parents[v] if p in top] for v in kept]
+            absorbed = [[(axis, p) for axis, p in enumerate(self.parents[v]) if p not in top] for v in kept]
+            structure = (kept, set(kept), parents, absorbed)
+            self._pruned[key] = structure
+            if len(self._pruned) > PRUNE_CACHE_SIZE:
+                self._pruned.popitem(last=False)
+        else:
+            self._pruned.move_to_end(key)
+        kept, kept_set, parents, absorbed = structure
+
+        tables = []
+        for v, fixed in zip(kept, absorbed):
+            table = self.cpt_table(v)
+            if fixed:
+                index = [slice(None)] * table.ndim
+                for axis, p in fixed:
+                    index[axis] = states[p]
+                table = table[tuple(index)]
+            tables.append(table)
+        reduced = BayesianNetwork([self.variables[v] for v in kept], parents, tables,
+                                  states=[self.states[v] for v in kept])
+        reduced.rng = self.rng
+        reduced_evidence = {var: val for var, val in evidence.items() if self.index[var] in kept_set}
+        return reduced, reduced_evidence
+
+    def sample(self, query_vars, evidence, method="lw", **options):
+        """
+        Approximate P(query | evidence) for every query variable from one sampling run,
+        by likelihood weighting ("lw") or blocked Gibbs sampling ("gibbs"). options go to the
+        sampler: target_error, time_limit (seconds), max_samples.
+        """
+        queries = [self.index[query_var] for query_var in query_vars]
+        states = self.evidence_states(evidence)
+        tables = [self.cpt_table(v).reshape(-1, self.cardinalities[v]) for v in range(len(self.variables))]
+        sampler = gibbs_sampling if method == "gibbs" else likelihood_weighting
+        return sampler(self.parents, self.cardinalities, tables, queries, states, self.rng, **options)
+
+    def distribution(self, query_var, evidence, heuristic="min-fill", method="ve", prune=False, **options):
+        """
+        P(query_var | evidence) as an array over query_var's states, by variable elimination
+        ("ve"), from the calibrated junction tree ("jt"), or by sampling ("lw", "gibbs"; see
+        sample()). With prune, the query runs on the network prune() keeps, except with "jt":
+        the junction tree is compiled once for the whole network and its calibrations cached,
+        which a new pruned network per query would throw away.
+        """
+        if prune and method != "jt":
+            evidence = {var: val for var, val in evidence.items() if var != query_var}
+            reduced, reduced_evidence = self.prune([query_var], evidence)
+            return reduced.distribution(query_var, reduced_evidence, heuristic, method, **options)
+        query = self.index[query_var]
+        # Like compute_probability, evidence on the query variable itself is ignored
+        if method in ("lw", "gibbs"):
+            evidence = {var: val for var, val in evidence.items() if var != query_var}
+            return self.sample([query_var], evidence, method, **options).estimates[0]
+        evidence = {v: state for v, state in self.evidence_states(evidence).items() if v != query}
+        if method == "jt":
+            return self.junction_tree(heuristic).marginal(query, evidence)
+        return variable_elimination(self.factors, query, evidence, heuristic)
+
+    def query(self, query_var, evidence, heuristic="min-fill", method="ve", prune=False, **options):
+        """Returns (P(query_var=true | evidence), P(query_var=false | evidence)); see distribution()."""
+        distribution = self.distribution(query_var, evidence, heuristic, method, prune, **options)
+        return float(distribution[1]), float(distribution[0])
+
+    def query_group(self, query_vars, evidence, heuristic="min-fill", method="ve", prune=False, **options):
+        """
+        Answers several query variables under one evidence set: the junction tree is calibrated
+        once, variable elimination reduces the CPTs once and shares intermediate factors, and
+        sampling estimates them all from one run. Returns {query_var: distribution}, or when
+        sampling {query_var: (distribution, half_widths, ess)} with the confidence half-width of
+        every state and the effective sample size. With prune (ignored for "jt", see
+        distribution()), the group runs on the network prune() keeps for all its query variables.
+        """
+        results = {}
+        if prune and method != "jt":
+            # Observed query variables ignore their own observation, so they are pruned apart
+            shared = [query_var for query_var in query_vars if query_var not in evidence]
+            if shared:
+                reduced, reduced_evidence = self.prune(shared, evidence)
+                results.update(reduced.query_group(shared, reduced_evidence, heuristic, method, **options))
+            for query_var in query_vars:
+                if query_var in evidence:
+                    reduced, reduced_evidence = self.prune([query_var], {var: val for var, val in evidence.items()
+                                                                          if var != query_var})
+                    results.update(reduced.query_group([query_var], reduced_evidence, heuristic, method, **options))
+            return results
+        states = self.evidence_states(evidence)
+        if method in ("lw", "gibbs"):
+            # A query variable that is also observed gets its own run without that observation
+            shared = [query_var for query_var in query_vars if query_var not in evidence]
+            runs = [(shared, evidence)] if shared else []
+            runs += [([query_var], {var: val for var, val in evidence.items() if var != query_var})
+                     for query_var in query_vars if query_var in evidence]
+            for run_vars, run_evidence in runs:
+                result = self.sample(run_vars, run_evidence, method, **options)
+                for i, query_var in enumerate(run_vars):
+                    results[query_var] = (result.estimates[i], result.half_widths[i], float(result.ess[i]))
+            return results
+        if method == "jt":
+            for query_var in query_vars:
+                results[query_var] = self.distribution(query_var, evidence, heuristic, method)
+            return results
+        reduced = [factor.reduce(states) for factor in self.factors]
+        hidden = {v for factor in reduced for v in factor.variables}
+        order = elimination_order(reduced, hidden, heuristic)
+        memo = {}
+        for query_var in query_vars:
+            query = self.index[query_var]
+            if query in states:
+                results[query_var] = self.distribution(query_var, evidence, heuristic, method)
+                continue
+            results[query_var] = variable_elimination(reduced, query, {}, heuristic, memo, order)
+        return results
+
+class QueryPlanner:
+    """
+    Answers batches of (query_var, evidence) pairs: duplicates are answered once, the rest are
+    grouped by evidence set and handed to solve_group(query_vars, evidence), which returns
+    {query_var: result}. Results are kept in a bounded LRU across batches.
+    """
+    def __init__(self, solve_group, cache_size=RESULT_CACHE_SIZE):
+        self.solve_group = solve_group
+        self.cache_size = cache_size
+        self.results = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def answer(self, queries):
+        keys = [(query_var, frozenset(evidence.items())) for query_var, evidence in queries]
+        answers = {}
+        groups = {}
+        for key in keys:
+            if key in answers:
+                continue
+            if key in self.results:
+                self.results.move_to_end(key)
+                answers[key] = self.results[key]
+                self.hits += 1
+            else:
+                groups.setdefault(key[1], {})[key[0]] = None
+                answers[key] = None
+                self.misses += 1
+        for evidence, query_vars in groups.items():
+            for query_var, result in self.solve_group(list(query_vars), dict(evidence)).items():
+                key = (query_var, evidence)
+                answers[key] = result
+                self.results[key] = result
+                if len(self.results) > self.cache_size:
+                    self.results.popitem(last=False)
+        return [answers[key] for key in keys]